@@ -1,37 +1,55 @@
 """
 Google Drive Uploader Module
-Handles authentication and file uploads to Google Drive using PyDrive2
+Handles authentication and folder setup with PyDrive2, and file uploads over a
+pooled keep-alive HTTP session
 """
 import os
 import json
 import io
-from pydrive2.auth import GoogleAuth
-from pydrive2.drive import GoogleDrive
-from PIL import Image
+import threading
+import uuid
+
+try:
+    import orjson
+except ImportError:  # Optional; falls back to the stdlib json encoder
+    orjson = None
+
+
+# Drive v3 multipart upload endpoint (metadata + content in one request)
+UPLOAD_URL = "https://www.googleapis.com/upload/drive/v3/files?uploadType=multipart&fields=id"
 
 
 class GDriveUploader:
     """Handle Google Drive uploads with folder organization"""
 
-    def __init__(self, credentials_file="credentials.json", folder_name="GlyphScribe_Output"):
+    def __init__(self, credentials_file="credentials.json", folder_name="GlyphScribe_Output", folder_paths=None):
         """
         Initialize Google Drive uploader
 
         Args:
             credentials_file: Path to OAuth credentials JSON file
             folder_name: Root folder name in Google Drive
+            folder_paths: Subfolder paths to resolve up front (e.g., ["batch/images", "batch/json"])
         """
         self.credentials_file = credentials_file
         self.root_folder_name = folder_name
         self.drive = None
+        self.session = None
         self.root_folder_id = None
         self.folder_cache = {}  # Cache folder IDs to avoid repeated lookups
+        self._folder_lock = threading.Lock()  # Serializes on-demand folder creation
 
         self._authenticate()
         self._setup_root_folder()
+        if folder_paths:
+            self.prepopulate_folders(folder_paths)
 
     def _authenticate(self):
         """Authenticate with Google Drive"""
+        # Imported here so importing this module stays cheap when no uploader is created
+        from pydrive2.auth import GoogleAuth
+        from pydrive2.drive import GoogleDrive
+
         gauth = GoogleAuth()
 
         # Set the path to client secrets (your credentials.json)
@@ -58,8 +76,54 @@ class GDriveUploader:
         gauth.SaveCredentialsFile(saved_creds_file)
 
         self.drive = GoogleDrive(gauth)
+        self.session = self._create_session(gauth.credentials)
         print("✓ Authenticated with Google Drive")
 
+    @staticmethod
+    def _create_session(oauth_credentials, pool_size=32):
+        """
+        Create a pooled keep-alive HTTP session for uploads
+
+        Connections are reused across uploads (and shared safely between
+        upload threads), so each upload skips the TLS handshake. Transient
+        errors are retried with exponential backoff.
+
+        Args:
+            oauth_credentials: oauth2client credentials obtained by PyDrive2
+            pool_size: Maximum number of pooled connections
+
+        Returns:
+            google.auth AuthorizedSession
+        """
+        from google.auth.transport.requests import AuthorizedSession
+        from google.oauth2.credentials import Credentials
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        credentials = Credentials(
+            token=oauth_credentials.access_token,
+            refresh_token=oauth_credentials.refresh_token,
+            token_uri=oauth_credentials.token_uri,
+            client_id=oauth_credentials.client_id,
+            client_secret=oauth_credentials.client_secret,
+            expiry=oauth_credentials.token_expiry,
+        )
+        session = AuthorizedSession(credentials)
+
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=2,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=frozenset(['GET', 'POST']),
+            ),
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
     def _setup_root_folder(self):
         """Create or get root folder in Google Drive"""
         # Check if folder already exists
@@ -82,52 +146,110 @@ class GDriveUploader:
 
         self.folder_cache[self.root_folder_name] = self.root_folder_id
 
-    def _get_or_create_folder(self, folder_path, parent_id=None):
+    def prepopulate_folders(self, folder_paths):
+        """
+        Resolve (and create if needed) folders up front so uploads only ever
+        hit the folder cache.
+
+        Every folder named like one of the path components is fetched with a
+        single compound query and the requested paths are walked in memory;
+        only missing path components cost a Drive call.
+
+        Args:
+            folder_paths: List of folder paths within root (e.g., ["batch/images", "batch/json"])
         """
-        Get or create a folder in Google Drive
+        titles = sorted({part for folder_path in folder_paths for part in folder_path.split('/')})
+        if not titles:
+            return
+        title_query = ' or '.join(
+            "title='{}'".format(title.replace('\\', '\\\\').replace("'", "\\'")) for title in titles)
+
+        # (parent_id, title) -> folder ID for every matching folder
+        # (GetList pages through the results 1000 at a time)
+        children = {}
+        for folder in self.drive.ListFile({
+            'q': f"({title_query}) and mimeType='application/vnd.google-apps.folder' and trashed=false",
+            'fields': 'nextPageToken, items(id, title, parents(id))'
+        }).GetList():
+            for parent in folder.get('parents', []):
+                children.setdefault((parent['id'], folder['title']), folder['id'])
+
+        for folder_path in folder_paths:
+            current_parent = self.root_folder_id
+
+            for part in folder_path.split('/'):
+                if (current_parent, part) not in children:
+                    # Create folder
+                    folder = self.drive.CreateFile({
+                        'title': part,
+                        'parents': [{'id': current_parent}],
+                        'mimeType': 'application/vnd.google-apps.folder'
+                    })
+                    folder.Upload()
+                    children[(current_parent, part)] = folder['id']
+                current_parent = children[(current_parent, part)]
+
+            self.folder_cache[folder_path] = current_parent
+
+    def _get_folder_id(self, folder_path):
+        """
+        Get folder ID, resolving (and creating if needed) the folder on first use
+
+        Folders passed in folder_paths are already cached; any other folder is
+        resolved with prepopulate_folders the first time it is used.
 
         Args:
-            folder_path: Folder path (e.g., "batch/images")
-            parent_id: Parent folder ID (default: root folder)
+            folder_path: Folder path within root (e.g., "batch/images")
 
         Returns:
             Folder ID
         """
-        if parent_id is None:
-            parent_id = self.root_folder_id
-
-        # Check cache
-        cache_key = f"{parent_id}/{folder_path}"
-        if cache_key in self.folder_cache:
-            return self.folder_cache[cache_key]
-
-        # Split path into parts
-        parts = folder_path.split('/')
-        current_parent = parent_id
-
-        for part in parts:
-            # Check if folder exists
-            file_list = self.drive.ListFile({
-                'q': f"title='{part}' and '{current_parent}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false"
-            }).GetList()
-
-            if file_list:
-                current_parent = file_list[0]['id']
-            else:
-                # Create folder
-                folder = self.drive.CreateFile({
-                    'title': part,
-                    'parents': [{'id': current_parent}],
-                    'mimeType': 'application/vnd.google-apps.folder'
-                })
-                folder.Upload()
-                current_parent = folder['id']
-
-        # Cache the result
-        self.folder_cache[cache_key] = current_parent
-        return current_parent
-
-    def upload_image(self, image, filename, folder_path="images"):
+        folder_id = self.folder_cache.get(folder_path)
+        if folder_id is None:
+            # The lock keeps concurrent uploads from creating the same folder twice
+            with self._folder_lock:
+                if folder_path not in self.folder_cache:
+                    self.prepopulate_folders([folder_path])
+                folder_id = self.folder_cache[folder_path]
+        return folder_id
+
+    def _upload_content(self, write_content, filename, folder_id, mimetype):
+        """
+        Upload file content with a single multipart request
+
+        The multipart body is assembled in memory; the content is written
+        directly into it between the metadata and trailer. The request is sent
+        as bytes, so the full body can be re-sent on retries and after a token
+        refresh.
+
+        Args:
+            write_content: Callable writing the file content to a binary file object
+            filename: Name of the file in Google Drive
+            folder_id: Parent folder ID
+            mimetype: MIME type of the content
+
+        Returns:
+            Google Drive file ID
+        """
+        boundary = uuid.uuid4().hex
+        metadata = json.dumps({'name': filename, 'parents': [folder_id], 'mimeType': mimetype})
+
+        body = io.BytesIO()
+        body.write(f"--{boundary}\r\nContent-Type: application/json; charset=UTF-8\r\n\r\n".encode())
+        body.write(metadata.encode('utf-8'))
+        body.write(f"\r\n--{boundary}\r\nContent-Type: {mimetype}\r\n\r\n".encode())
+        write_content(body)
+        body.write(f"\r\n--{boundary}--".encode())
+
+        response = self.session.post(
+            UPLOAD_URL,
+            data=body.getvalue(),
+            headers={'Content-Type': f'multipart/related; boundary={boundary}'},
+        )
+        response.raise_for_status()
+        return response.json()['id']
+
+    def upload_image(self, image, filename, folder_path="images", image_format="PNG", compress_level=1):
         """
         Upload PIL Image directly to Google Drive
 
@@ -135,29 +257,23 @@ class GDriveUploader:
             image: PIL Image object
             filename: Name of the file (e.g., "image_000001.png")
             folder_path: Subfolder path within root (e.g., "batch/images")
+            image_format: PIL format to encode with ("PNG" or e.g. "WEBP")
+            compress_level: zlib level for PNG (1 = fastest; PIL's default is 6)
 
         Returns:
             Google Drive file ID
         """
-        # Get or create folder
-        folder_id = self._get_or_create_folder(folder_path)
-
-        # Convert PIL Image to bytes
-        img_byte_arr = io.BytesIO()
-        image.save(img_byte_arr, format='PNG')
-        img_byte_arr.seek(0)
-
-        # Create file in Google Drive
-        file = self.drive.CreateFile({
-            'title': filename,
-            'parents': [{'id': folder_id}]
-        })
+        folder_id = self._get_folder_id(folder_path)
 
-        # Set content from bytes
-        file.content = img_byte_arr
-        file.Upload()
+        # Encode PIL Image straight into the upload body
+        if image_format == 'PNG':
+            save_options = {'compress_level': compress_level, 'optimize': False}
+        else:
+            save_options = {'quality': 90, 'method': 0}
 
-        return file['id']
+        return self._upload_content(
+            lambda f: image.save(f, format=image_format, **save_options),
+            filename, folder_id, f'image/{image_format.lower()}')
 
     def upload_json(self, json_data, filename, folder_path="json"):
         """
@@ -171,24 +287,83 @@ class GDriveUploader:
         Returns:
             Google Drive file ID
         """
-        # Get or create folder
-        folder_id = self._get_or_create_folder(folder_path)
+        folder_id = self._get_folder_id(folder_path)
+
+        # Convert dict straight to compact UTF-8 JSON bytes (same output with or without orjson)
+        if orjson is not None:
+            json_bytes = orjson.dumps(json_data)
+        else:
+            json_bytes = json.dumps(json_data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+        return self._upload_content(lambda f: f.write(json_bytes), filename, folder_id, 'application/json')
+
+    def upload_image_with_json(self, image, json_data, image_filename, json_filename,
+                               image_folder="images", json_folder="json"):
+        """
+        Upload a PIL Image followed by its JSON metadata
+
+        The JSON is only uploaded once the image upload succeeded, so a failed
+        image never leaves an orphaned metadata file behind.
 
-        # Convert dict to JSON string
-        json_str = json.dumps(json_data, indent=2, ensure_ascii=False)
+        Args:
+            image: PIL Image object
+            json_data: Metadata dictionary for the image
+            image_filename: Name of the image file (e.g., "image_000001.png")
+            json_filename: Name of the JSON file (e.g., "image_000001.json")
+            image_folder: Subfolder path for the image (e.g., "batch/images")
+            json_folder: Subfolder path for the JSON (e.g., "batch/json")
 
-        # Create file in Google Drive
-        file = self.drive.CreateFile({
-            'title': filename,
-            'parents': [{'id': folder_id}],
-            'mimeType': 'application/json'
-        })
+        Returns:
+            Tuple of (image file ID, JSON file ID)
+        """
+        image_id = self.upload_image(image, image_filename, folder_path=image_folder)
+        json_id = self.upload_json(json_data, json_filename, folder_path=json_folder)
+        return image_id, json_id
 
-        # Set content from string
-        file.SetContentString(json_str)
-        file.Upload()
+    def upload_bytes(self, data, filename, folder_path, mimetype):
+        """
+        Upload already encoded file content to Google Drive
 
-        return file['id']
+        Args:
+            data: File content as bytes (e.g., an encoded PNG)
+            filename: Name of the file (e.g., "image_000001.png")
+            folder_path: Subfolder path within root (e.g., "batch/images")
+            mimetype: MIME type of the content (e.g., "image/png")
+
+        Returns:
+            Google Drive file ID
+        """
+        folder_id = self._get_folder_id(folder_path)
+        return self._upload_content(lambda f: f.write(data), filename, folder_id, mimetype)
+
+    def batch_upload(self, items):
+        """
+        Upload a batch of encoded images and JSON files, one after another
+
+        Drive's batch endpoint does not accept media uploads, so every file is
+        sent as its own multipart request over the pooled keep-alive session.
+        The uploads run on the calling thread; run batches on several threads
+        for concurrency. A failed upload does not stop the rest of the batch.
+
+        Args:
+            items: List of (kind, content, filename, folder_path) tuples, where
+                kind is "png" (content is encoded PNG bytes) or "json" (content is a dict)
+
+        Returns:
+            List with the Google Drive file ID, or the raised exception, for each item
+        """
+        results = []
+        for kind, content, filename, folder_path in items:
+            try:
+                if kind == 'png':
+                    results.append(self.upload_bytes(content, filename, folder_path, 'image/png'))
+                elif kind == 'json':
+                    results.append(self.upload_json(content, filename, folder_path=folder_path))
+                else:
+                    raise ValueError(f"Unknown upload kind: {kind!r}")
+            except Exception as e:
+                results.append(e)
+        return results
 
     def get_folder_url(self):
         """Get the URL to the root folder in Google Drive"""
@@ -196,6 +371,6 @@ class GDriveUploader:
 
 
 # Convenience function for easy import
-def create_uploader(folder_name="GlyphScribe_Output"):
+def create_uploader(folder_name="GlyphScribe_Output", folder_paths=None):
     """Create and return a GDriveUploader instance"""
-    return GDriveUploader(folder_name=folder_name)
+    return GDriveUploader(folder_name=folder_name, folder_paths=folder_paths)
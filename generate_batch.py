@@ -2,25 +2,21 @@
 Batch image generation script with Google Drive upload.
 Generates multi-line images and uploads directly to Google Drive without local storage.
 """
-import random
-from pathlib import Path
+import os
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
-from glyphscribe.glyph_scribe_memory import GlyphScribeMemory
+from glyphscribe.pipeline import (
+    get_all_fonts, create_render_pool, prefetch, resolve_text_column, sample_param_tables,
+    build_task, render_in_order, submit_upload,
+)
 from datasets import load_dataset
 from gdrive_uploader import GDriveUploader
 
-
 #ds = load_dataset("hishab/titulm-bangla-corpus", "default", streaming=True)
 
 
-def get_all_fonts(fonts_dir):
-    """Get all font paths from the fonts directory."""
-    font_paths = []
-    for ext in ['*.ttf', '*.otf']:
-        font_paths.extend(Path(fonts_dir).rglob(ext))
-    return [str(p) for p in font_paths]
-
-
 def main():
     # Configuration
     NUM_IMAGES = 10000
@@ -28,6 +24,9 @@ def main():
     MAX_TEXT_LENGTH = 300  # Increased for multi-line support
     MAX_LINE_WIDTH = 1400  # Maximum width per line in pixels
     GDRIVE_FOLDER = "GlyphScribe_Output"  # Root folder in Google Drive
+    RENDER_WORKERS = os.cpu_count()  # Image synthesis processes
+    UPLOAD_WORKERS = 16  # Concurrent uploads overlapping with generation
+    MAX_IN_FLIGHT = 64  # Pending uploads before generation waits (bounds queued images in memory)
 
     print("="*60)
     print("GlyphScribe Batch Generator (Google Drive)")
@@ -36,7 +35,8 @@ def main():
     # Initialize Google Drive uploader
     print("\n[1/5] Connecting to Google Drive...")
     try:
-        uploader = GDriveUploader(folder_name=GDRIVE_FOLDER)
+        uploader = GDriveUploader(folder_name=GDRIVE_FOLDER,
+                                  folder_paths=["batch/images", "batch/json"])
         print(f"✓ Connected to Google Drive")
         print(f"  Folder URL: {uploader.get_folder_url()}")
     except Exception as e:
@@ -52,91 +52,80 @@ def main():
     ds = load_dataset("hishab/titulm-bangla-corpus", "default", streaming=True)
     dataset_stream = ds['train'] if 'train' in ds else ds[list(ds.keys())[0]]
 
-    # Sample texts from dataset
+    # Sample texts from dataset; samples are fetched in the background while images render
     print(f"✓ Sampling {NUM_IMAGES} random texts from dataset...")
-    dataset = list(dataset_stream.shuffle(seed=42, buffer_size=10000).take(NUM_IMAGES))
-    print(f"✓ Loaded {len(dataset)} samples")
+    samples = prefetch(dataset_stream.shuffle(seed=42, buffer_size=10000).take(NUM_IMAGES))
+
+    # The schema is fixed, so resolve the text column once from the first sample
+    first_sample = next(samples, None)
+    text_col = resolve_text_column(first_sample) if first_sample is not None else None
+    if first_sample is not None:
+        samples = itertools.chain([first_sample], samples)
 
     # Get all fonts
     print(f"\n[3/5] Finding fonts...")
     fonts = get_all_fonts(FONTS_DIR)
     print(f"✓ Found {len(fonts)} fonts")
 
-    # Initialize GlyphScribe (memory mode)
-    print("\n[4/5] Initializing GlyphScribe...")
-    scribe = GlyphScribeMemory()
-    print("✓ Ready")
-
-    # Generate and upload images
-    print(f"\n[5/5] Generating and uploading {NUM_IMAGES} images to Google Drive...\n")
-
-    successful = 0
+    # Build generation tasks lazily, as samples arrive from the stream
+    print("\n[4/5] Preparing generation tasks...")
+    param_tables = sample_param_tables(NUM_IMAGES)
     failed = 0
 
-    for img_idx in tqdm(range(NUM_IMAGES), desc="Progress"):
-        try:
-            # Get text from dataset
-            sample = dataset[img_idx]
-
+    def generate_tasks():
+        nonlocal failed
+        for img_idx, sample in enumerate(samples):
             # Extract text from dataset
-            text = None
-            for col in ['text', 'sentence', 'content', 'line']:
-                if col in sample:
-                    text = sample[col]
-                    break
+            text = sample.get(text_col)
 
-            if not text:
-                text = next((v for v in sample.values() if isinstance(v, str)), None)
-
-            if not text or len(text.strip()) == 0:
+            if not isinstance(text, str) or not text or len(text.strip()) == 0:
                 failed += 1
                 continue
 
-            # Randomly decide if this should be single-line or multi-line
-            is_multiline = random.choice([True, False])
-
-            # Adjust text length based on line type
-            max_length = MAX_TEXT_LENGTH if is_multiline else 80
-            if len(text) > max_length:
-                text = text[:max_length]
-
             # Cycle through all fonts
             font_path = fonts[img_idx % len(fonts)]
 
-            # Random parameters for variety
-            image_filename = f"image_{img_idx:06d}.png"
-            json_filename = f"image_{img_idx:06d}.json"
-
-            params = {
-                'text': text,
-                'font_size': random.choice([40, 44, 48, 52]),
-                'font_path': font_path,
-                'background_path': "",
-                'angle': random.choice([0, 0, 0, 0, 5, -5]),
-                'bars': random.choice([False, False, False, True]),
-                'add_random_text': False,
-                'add_curves': False,
-                'add_boxes': False,
-                'apply_data_augmentation': random.choice([True, True, False]),
-                'white_background': random.choice([True, True, True, True, False]),
-                'multiline': is_multiline,
-                'max_line_width': MAX_LINE_WIDTH,
-            }
-
-            # Generate image in memory
-            image, metadata = scribe.generate_to_memory(**params)
-
-            # Upload image to Google Drive
-            uploader.upload_image(image, image_filename, folder_path="batch/images")
-
-            # Upload JSON metadata to Google Drive
-            uploader.upload_json(metadata, json_filename, folder_path="batch/json")
-
-            successful += 1
-
-        except Exception as e:
-            tqdm.write(f"Error at {img_idx}: {e}")
-            failed += 1
+            yield build_task(img_idx, text, font_path, MAX_TEXT_LENGTH, MAX_LINE_WIDTH, param_tables)
+    print("✓ Tasks are built as samples stream in")
+
+    # Generate and upload images
+    print(f"\n[5/5] Generating and uploading {NUM_IMAGES} images to Google Drive "
+          f"({RENDER_WORKERS} render workers)...\n")
+
+    upload_futures = {}  # Future -> image index
+    upload_slots = threading.BoundedSemaphore(MAX_IN_FLIGHT)
+
+    with create_render_pool(RENDER_WORKERS) as render_pool, \
+            ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as upload_pool:
+        renders = render_in_order(render_pool, generate_tasks(), RENDER_WORKERS * 4)
+        for task, render in tqdm(renders, total=NUM_IMAGES, desc="Progress"):
+            img_idx = task['img_idx']
+            try:
+                image, metadata = render.result()
+
+                image_filename = f"image_{img_idx:06d}.png"
+                json_filename = f"image_{img_idx:06d}.json"
+
+                # Upload the image, then its JSON metadata, to Google Drive in the background
+                upload_futures[submit_upload(
+                    upload_pool, upload_slots, uploader.upload_image_with_json, image, metadata,
+                    image_filename, json_filename, "batch/images", "batch/json")] = img_idx
+
+            except Exception as e:
+                tqdm.write(f"Error at {img_idx}: {e}")
+                failed += 1
+
+        # Wait for in-flight uploads and count images whose uploads succeeded
+        failed_uploads = 0
+        for future in as_completed(upload_futures):
+            try:
+                future.result()
+            except Exception as e:
+                tqdm.write(f"Upload error at {upload_futures[future]}: {e}")
+                failed_uploads += 1
+
+    successful = len(upload_futures) - failed_uploads
+    failed += failed_uploads
 
     # Summary
     print("\n" + "="*60)
@@ -1,72 +1,145 @@
 from torchvision import transforms
+from torchvision.transforms import functional as F
+from typing import Tuple
+import warnings
 import torch
-import numpy as np
-
-class Transformations:
-    class RandomNoise(object):
-        """
-        The transformation first adds the generated noise to the input tensor.
-        noise.unsqueeze(0) adds a channel dimension back to the noise (e.g., from [H, W] to [1, H, W]). 
-        The result is then clamped between 0 and 1, ensuring the pixel values remain valid (standard for normalized images).
-        """    
-
-        # enters noise(distortion to the image tensor with some range ig)
-        def __init__(self, min_noise_level=0.1, max_noise_level=0.3):
-            self.min_noise_level = min_noise_level
-            self.max_noise_level = max_noise_level
-        # this is the main place where stuff is working
-        #Clamps all elements in the input tensor into the range [min,max].
-        def __call__(self, tensor):
-            noise = torch.randn_like(tensor[0]) * np.random.uniform(self.min_noise_level, self.max_noise_level)
-            return torch.clamp(tensor + noise.unsqueeze(0), 0, 1)
-
-    class ElasticGrid(object):
-        """
-        generates elastic distortion on the image,simulating non-linear local deformations.
-        Parameters: 
-            alpha (controls the intensity of the displacement),
-            sigma (controls the smoothness of the displacement),
-            interpolation (resampling filter), 
-            and fill (value for points outside the input boundaries).
-        """
-
-        def __init__(self, sigma=5.0):
-            self.sigma = sigma
-
-        def __call__(self, tensor):
-            return transforms.ElasticTransform(
-                alpha=max(2, 9-(20/1000)*tensor.shape[0]), 
-                sigma=self.sigma, 
-                interpolation=transforms.InterpolationMode.BILINEAR, 
-                fill=1)(tensor)
-
-    class Resize(object):
-        """
-        applies a random horizontal and vertical resizing/stretching to the image
-        Resizes the image to the given size.
-        Parameters:
-            size (the desired output size, often a tuple (H, W) or a single integer),
-            and optional interpolation
-        """
-        def __init__(self, horizontal_ratio=(0.3,1.5), vertical_ratio=(0.9,1.1)):
-            self.horizontal_ratio = horizontal_ratio
-            self.vertical_ratio = vertical_ratio
-
-        def __call__(self, tensor):
-            _, height, width = tensor.shape
-            return transforms.Resize(
-                (int(height * np.random.uniform(*self.vertical_ratio)), int(width * np.random.uniform(*self.horizontal_ratio))), 
-                interpolation=transforms.InterpolationMode.BILINEAR
-            )(tensor)
-            
-    
+
+
+BILINEAR = transforms.InterpolationMode.BILINEAR
+
+
+def apply_with_probability(p: float) -> bool:
+    """
+    Coin flip used in place of transforms.RandomApply (draws from the torch RNG, like RandomApply does).
+    """
+    return bool(torch.rand(1).item() < p)
+
+
+def random_rotation(tensor: torch.Tensor, degrees: float = 1.0) -> torch.Tensor:
+    """
+    Rotates the image by a random angle in [-degrees, degrees], filling the uncovered corners with white.
+    """
+    angle = float(torch.empty(1).uniform_(-degrees, degrees).item())
+    return F.rotate(tensor, angle, fill=[1.0])
+
+
+def random_noise(tensor: torch.Tensor, min_noise_level: float = 0.1, max_noise_level: float = 0.3) -> torch.Tensor:
+    """
+    Adds gaussian noise with a random intensity to the input tensor in place.
+    The input is grayscale ([1, H, W]), so the noise is drawn at the full tensor shape and no broadcast is needed.
+    The result is then clamped between 0 and 1, ensuring the pixel values remain valid (standard for normalized images).
+    """
+    # tensor is a fresh intermediate of the pipeline, so it is safe to modify in place
+    sigma = float(torch.empty(1).uniform_(min_noise_level, max_noise_level).item())
+    noise = torch.empty_like(tensor).normal_(0.0, sigma)
+    return tensor.add_(noise).clamp_(0.0, 1.0)
+
+
+def gaussian_kernel(sigma: float) -> torch.Tensor:
+    """
+    1-D gaussian kernel with the same size and weights ElasticTransform uses.
+    """
+    size = int(8 * sigma + 1)
+    if size % 2 == 0:
+        size += 1
+    x = torch.linspace(-(size - 1) / 2, (size - 1) / 2, steps=size)
+    kernel = torch.exp(-0.5 * (x / sigma) ** 2)
+    return kernel / kernel.sum()
+
+
+def _smooth_displacement(height: int, width: int, kernel: torch.Tensor) -> torch.Tensor:
+    """
+    Random [-1, 1] fields for dx and dy (stacked as [2, 1, H, W]) smoothed by a gaussian.
+    The blur is separable, so it runs as a row pass and a column pass instead of a full 2-D convolution.
+    """
+    field = torch.rand([2, 1, height, width]) * 2 - 1
+    pad = kernel.numel() // 2
+    field = torch.nn.functional.pad(field, [pad, pad, pad, pad], mode="reflect")
+    field = torch.nn.functional.conv2d(field, kernel.view(1, 1, 1, -1))
+    return torch.nn.functional.conv2d(field, kernel.view(1, 1, -1, 1))
+
+
+def elastic_grid(tensor: torch.Tensor, kernel: torch.Tensor) -> torch.Tensor:
+    """
+    generates elastic distortion on the image,simulating non-linear local deformations.
+    Parameters:
+        alpha (controls the intensity of the displacement),
+        kernel (gaussian_kernel(sigma), sigma controls the smoothness of the displacement),
+        interpolation (resampling filter),
+        and fill (value for points outside the input boundaries).
+    """
+    height, width = tensor.shape[-2], tensor.shape[-1]
+    # distortion strength shrinks with image height (tensor is [C, H, W])
+    alpha = max(2.0, 9.0 - (20.0 / 1000.0) * height)
+    field = _smooth_displacement(height, width, kernel)
+    # normalize displacements by width/height, as ElasticTransform does -> [1, H, W, 2]
+    displacement = torch.stack([field[0] * alpha / width, field[1] * alpha / height], dim=-1)
+    return F.elastic_transform(
+        tensor,
+        displacement,
+        interpolation=BILINEAR,
+        fill=[1.0])
+
+
+def random_resize(tensor: torch.Tensor,
+                  horizontal_ratio: Tuple[float, float] = (0.3, 1.5),
+                  vertical_ratio: Tuple[float, float] = (0.9, 1.1)) -> torch.Tensor:
+    """
+    applies a random horizontal and vertical resizing/stretching to the image
+    Parameters:
+        horizontal_ratio (range the width is scaled by),
+        and vertical_ratio (range the height is scaled by)
+    """
+    height, width = tensor.shape[-2], tensor.shape[-1]
+    vertical = float(torch.empty(1).uniform_(vertical_ratio[0], vertical_ratio[1]).item())
+    horizontal = float(torch.empty(1).uniform_(horizontal_ratio[0], horizontal_ratio[1]).item())
+    return F.resize(
+        tensor,
+        [int(height * vertical), int(width * horizontal)],
+        interpolation=BILINEAR,
+        antialias=True)
+
+
+class Augmentation(torch.nn.Module):
+    """
+    Tensor part of the augmentation pipeline, written as one module so it can be compiled with TorchScript.
+    Expects a grayscale [1, H, W] float tensor in [0, 1].
+    """
+
+    def __init__(self, sigma: float = 5.0):
+        super().__init__()
+        # elastic smoothing kernel, built once
+        self.register_buffer("kernel", gaussian_kernel(sigma))
+
+    def forward(self, tensor: torch.Tensor) -> torch.Tensor:
+        if apply_with_probability(0.5):  # small random rotation is implemented
+            tensor = random_rotation(tensor, 1.0)
+        if apply_with_probability(0.8):  # Adds Gaussian (normal) noise with random intensity (0.1-0.2).
+            tensor = random_noise(tensor, 0.1, 0.2)
+        if apply_with_probability(0.01):  # Inverts the image colors (img=1−img).
+            tensor = 1.0 - tensor
+        if apply_with_probability(0.8):  # elastic grid,non-linear, local geometric distortion
+            tensor = elastic_grid(tensor, self.kernel)
+        if apply_with_probability(0.5):  # Applies a random stretch/compression to the aspect ratio.
+            tensor = random_resize(tensor)
+        return tensor
+
+
+def _compile(module):
+    """
+    Script the module with TorchScript, falling back to eager mode where scripting is unavailable.
+    """
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", FutureWarning)  # newer torch releases deprecate torch.jit.script
+            return torch.jit.script(module)
+    except Exception:
+        return module
+
+
 data_transformer = transforms.Compose([
+    transforms.Grayscale(),  #Reduce the image to a single channel (on the uint8 PIL image, before the float conversion)
     transforms.ToTensor(),   # image to tensor
-    transforms.Grayscale(),  #Reduce the image to a single channel
-    transforms.RandomApply([transforms.RandomRotation(degrees=1, fill=1)], p=0.5), # small random rotation is implemented
-    transforms.RandomApply([Transformations.RandomNoise(min_noise_level=0.1, max_noise_level=0.2)], p=0.8), # p=0.8	Adds Gaussian (normal) noise with random intensity (0.1-0.2).
-    transforms.RandomApply([transforms.functional.invert],p=0.01), # Inverts the image colors (img=1−img).
-    transforms.RandomApply([Transformations.ElasticGrid(sigma=5.0)], p=0.8), # elastic grid,non-linear, local geometric distortion
-    transforms.RandomApply([Transformations.Resize()], p=0.5), # Applies a random stretch/compression to the aspect ratio.  
+    _compile(Augmentation(sigma=5.0)),  # rotation, noise, invert, elastic grid and resize as one scripted module
     transforms.ToPILImage()
-])
\ No newline at end of file
+])
@@ -1,5 +1,7 @@
 import random
-from PIL import Image, ImageDraw, ImageFont, ImageOps
+import functools
+import re
+from PIL import Image, ImageDraw, ImageFont
 import string
 import numpy as np
 import math
@@ -8,12 +10,113 @@ import json
 from .augmentation import data_transformer
 from bidi.algorithm import get_display
 
+try:
+    import orjson
+except ImportError:  # Optional; falls back to the stdlib json encoder
+    orjson = None
+
 # Adding Bangla characters
 bangla_characters = ''.join([chr(i) for i in range(0x0980, 0x09FF + 1)])
 
 # Combine with other character sets as needed
 all_characters = string.punctuation + " " + bangla_characters
 
+# Word patterns: a word with its trailing spaces, and a bare word
+_WORD_RE = re.compile(r'\S+\s*')
+_NONSPACE_RE = re.compile(r'\S+')
+
+# Right-to-left scripts (Hebrew through Arabic Extended, presentation forms, RTL SMP blocks) and bidi controls
+_RTL_RE = re.compile('[\u0590-\u08ff\u200f\u202a-\u202e\u2066-\u2069\ufb1d-\ufdff\ufe70-\ufeff'
+                     '\U00010800-\U00010fff\U0001e800-\U0001efff]')
+
+
+@functools.lru_cache(maxsize=512)
+def load_font(font_path, font_size):
+    """
+    Load a TrueType/OpenType font, cached by (font_path, font_size) so each font file is parsed once per size.
+
+    Args:
+        font_path (str): Path to the font file
+        font_size (int): Font size
+
+    Returns:
+        ImageFont.FreeTypeFont object
+    """
+    return ImageFont.truetype(font_path, size=font_size)
+
+
+def needs_bidi(text):
+    """
+    Check whether text needs bidi reordering; get_display leaves text without RTL characters unchanged.
+
+    Args:
+        text (str): Text to check
+
+    Returns:
+        bool: True if the text contains right-to-left characters or bidi controls
+    """
+    return _RTL_RE.search(text) is not None
+
+
+def random_gray():
+    """
+    Random dark gray color as an RGB tuple (each channel in [0, 100)).
+
+    Returns:
+        tuple: (v, v, v)
+    """
+    value = random.randrange(100)
+    return (value, value, value)
+
+
+@functools.lru_cache(maxsize=64)
+def load_background(background_path):
+    """
+    Load and decode a background image once; callers resize a copy, so the cached image is never modified.
+
+    Args:
+        background_path (str): Path to the background image
+
+    Returns:
+        PIL.Image in RGB mode
+    """
+    with Image.open(background_path) as background_image:
+        return background_image.convert("RGB")
+
+
+# Drawing context used only for text measurement
+_measure_draw = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+
+
+def measure_text(text, font):
+    """
+    Measure text without allocating a canvas (uses a shared 1x1 scratch drawing context).
+
+    Args:
+        text (str): Text to measure
+        font: ImageFont object
+
+    Returns:
+        tuple: (width, height) of the text
+    """
+    # Using textsize for compatibility with Pillow < 8.0.0
+    return _measure_draw.textsize(text, font=font)
+
+
+@functools.lru_cache(maxsize=4096)
+def character_size(font, character):
+    """
+    Measure a single character, cached per font (fonts from load_font are shared, so the cache hits across images).
+
+    Args:
+        font: ImageFont object
+        character (str): Character to measure
+
+    Returns:
+        tuple: (width, height) of the character
+    """
+    return measure_text(character, font)
+
 
 class GlyphScribe:
     """
@@ -31,6 +134,7 @@ class GlyphScribe:
         self.base_fonts_dir = base_fonts_dir
         self.background_base_dir = background_base_dir
         self.all_characters = string.punctuation + " " + bangla_characters
+        self._directory_listings = {}  # Cache of os.listdir results, filled on first use
 
     @staticmethod
     def calculate_skew_offset(x, x_pivot, angle):
@@ -42,8 +146,8 @@ class GlyphScribe:
             x_pivot: x-coodinate of the pivot based on which the text has to be skewed.
             angle: angle of the skew (in degrees).
         """
-        angle = np.radians(angle)
-        delta_y = (x_pivot - x) * np.tan(angle)
+        angle = math.radians(angle)
+        delta_y = (x_pivot - x) * math.tan(angle)
         return delta_y
 
     @staticmethod
@@ -56,7 +160,7 @@ class GlyphScribe:
             amplitude: amplitude of the sine wave.
             frequency: frequency of the sine wave.
         """
-        return int(amplitude * np.sin(frequency * x))
+        return int(amplitude * math.sin(frequency * x))
 
     @staticmethod
     def extract_words(sentence):
@@ -69,8 +173,7 @@ class GlyphScribe:
         Returns:
             list: A list of words in the sentence, including spaces.
         """
-        import re
-        words = re.findall(r'\S+\s*', sentence)
+        words = _WORD_RE.findall(sentence)
         return words
 
     @staticmethod
@@ -86,20 +189,13 @@ class GlyphScribe:
         Returns:
             list: List of text lines
         """
-        import re
-        from PIL import ImageDraw, Image
-
-        # Create temporary draw object for measuring
-        temp_img = Image.new("RGB", (1, 1))
-        draw = ImageDraw.Draw(temp_img)
-
-        words = re.findall(r'\S+', text)
+        words = _NONSPACE_RE.findall(text)
         lines = []
         current_line = ""
 
         for word in words:
             test_line = current_line + word + " " if current_line else word + " "
-            test_width, _ = draw.textsize(test_line, font=font)
+            test_width, _ = measure_text(test_line, font)
 
             if test_width <= max_width:
                 current_line = test_line
@@ -113,6 +209,21 @@ class GlyphScribe:
 
         return lines if lines else [text]
 
+    def _list_directory(self, directory):
+        """
+        List a directory once and reuse the listing for later calls.
+
+        Args:
+            directory (str): Directory to list
+
+        Returns:
+            list: File names in the directory
+        """
+        listing = self._directory_listings.get(directory)
+        if listing is None:
+            listing = self._directory_listings[directory] = os.listdir(directory)
+        return listing
+
     def get_random_font_path(self, font_type="hw"):
         """
         Get a random font path from the fonts directory.
@@ -123,7 +234,7 @@ class GlyphScribe:
         Returns:
             str: Path to a random font file
         """
-        font_name = np.random.choice(os.listdir(f"{self.base_fonts_dir}/{font_type}/"))
+        font_name = random.choice(self._list_directory(f"{self.base_fonts_dir}/{font_type}/"))
         return os.path.join(self.base_fonts_dir, font_type, font_name)
 
     def get_random_background_path(self):
@@ -133,28 +244,36 @@ class GlyphScribe:
         Returns:
             str: Path to a random background image
         """
-        background_image_name = np.random.choice(os.listdir(f"{self.background_base_dir}/"))
+        background_image_name = random.choice(self._list_directory(f"{self.background_base_dir}/"))
         return os.path.join(self.background_base_dir, background_image_name)
 
-    def add_bars(self, draw, image_size):
+    def add_bars(self, image):
         """
         Add random vertical and horizontal bars to the image.
 
+        Bars are axis-aligned, so each one is a solid rectangle fill (the same pixels
+        draw.line covers for that width) instead of a rasterized line.
+
         Args:
-            draw: ImageDraw object
-            image_size: Tuple of (width, height)
+            image: PIL Image object, modified in place
         """
-        for _ in range(random.randint(3, 6)):
-            bar_x = random.randint(0, image_size[0] - 1)
-            draw.line([(bar_x, 0), (bar_x, image_size[1])],
-                     fill=tuple([np.random.randint(0, 100)] * 3),
-                     width=random.randint(1, 3))
+        image_width, image_height = image.size
 
-        for _ in range(random.randint(1, 3)):
-            bar_y = random.randint(0, image_size[1] - 1)
-            draw.line([(0, bar_y), (image_size[0], bar_y)],
-                     fill=tuple([np.random.randint(0, 100)] * 3),
-                     width=random.randint(1, 3))
+        # Draw every bar's position, width and gray level up front
+        num_vertical = random.randint(3, 6)
+        num_horizontal = random.randint(1, 3)
+        bar_xs = np.random.randint(0, image_width, size=num_vertical).tolist()
+        bar_ys = np.random.randint(0, image_height, size=num_horizontal).tolist()
+        widths = np.random.randint(1, 4, size=num_vertical + num_horizontal).tolist()
+        grays = np.random.randint(0, 100, size=num_vertical + num_horizontal).tolist()
+
+        for bar_x, width, gray in zip(bar_xs, widths[:num_vertical], grays[:num_vertical]):
+            left = bar_x - (width - 1) // 2
+            image.paste((gray, gray, gray), (max(left, 0), 0, min(left + width, image_width), image_height))
+
+        for bar_y, width, gray in zip(bar_ys, widths[num_vertical:], grays[num_vertical:]):
+            top = bar_y - (width - 1) // 2
+            image.paste((gray, gray, gray), (0, max(top, 0), image_width, min(top + width, image_height)))
 
     def add_random_text_overlay(self, draw, text, font, padding, image_size):
         """
@@ -179,7 +298,7 @@ class GlyphScribe:
              else -text_height + random.randint(5, 15)),
             random_text,
             font=font,
-            fill=tuple([np.random.randint(0, 100)] * 3),
+            fill=random_gray(),
         )
 
     def draw_text_with_boxes(self, draw, text, font, padding, tol, character_width, character_height):
@@ -195,8 +314,8 @@ class GlyphScribe:
             character_width: Average character width
             character_height: Average character height
         """
-        color = tuple([np.random.randint(0, 100)] * 3)
-        text_color = tuple([np.random.randint(0, 100)] * 3)
+        color = random_gray()
+        text_color = random_gray()
         width = random.randint(1, 3)
 
         for i in range(len(text)):
@@ -217,6 +336,22 @@ class GlyphScribe:
                 fill=text_color,
             )
 
+    @staticmethod
+    def word_positions(words, font, x_start):
+        """
+        Compute the x-coordinate of each word when the words are drawn one after another.
+
+        Args:
+            words: List of words
+            font: Font object
+            x_start: x-coordinate of the first word
+
+        Returns:
+            np.ndarray: x-coordinate of each word
+        """
+        widths = np.array([measure_text(word, font)[0] for word in words], dtype=np.int64)
+        return x_start + np.concatenate(([0], np.cumsum(widths)[:-1]))
+
     def draw_text_with_curves(self, draw, words, font, padding):
         """
         Draw text with curved effect.
@@ -227,19 +362,18 @@ class GlyphScribe:
             font: Font object
             padding: Padding tuple
         """
-        x, y = padding[0], padding[1]
-        for word in words:
-            offset_y = self.calculate_bent_offset(x=x, amplitude=4, frequency=0.02)
+        xs = self.word_positions(words, font, padding[0])
+        # Same sine wave as calculate_bent_offset(x, amplitude=4, frequency=0.02), for all words at once
+        offsets = (4 * np.sin(0.02 * xs)).astype(int)
+        y = padding[1]
+        for word, x, offset_y in zip(words, xs.tolist(), offsets.tolist()):
             draw.text(
                 (x, y + offset_y),
                 word,
                 font=font,
-                fill=tuple([np.random.randint(0, 100)] * 3),
+                fill=random_gray(),
             )
 
-            word_width, _ = draw.textsize(word, font=font)
-            x += word_width
-
     def draw_text_with_skew(self, draw, words, font, padding, text_width, image_height, angle):
         """
         Draw text with skew effect.
@@ -253,24 +387,76 @@ class GlyphScribe:
             image_height: Height of the image
             angle: Skew angle
         """
-        x, y = padding[0], (image_height // 2)
-        x_mid = x + (text_width // 2)
-        for word in words:
-            offset_y = self.calculate_skew_offset(x=x, x_pivot=x_mid, angle=angle)
+        xs = self.word_positions(words, font, padding[0])
+        y = image_height // 2
+        x_mid = padding[0] + (text_width // 2)
+        # Same as calculate_skew_offset(x, x_mid, angle), for all words at once
+        offsets = (x_mid - xs) * math.tan(math.radians(angle))
+        for word, x, offset_y in zip(words, xs.tolist(), offsets.tolist()):
             draw.text(
                 (x, y - offset_y),
                 word,
                 font=font,
-                fill=tuple([np.random.randint(0, 100)] * 3),
+                fill=random_gray(),
             )
 
-            word_width, _ = draw.textsize(word, font=font)
-            x += word_width
+    @staticmethod
+    def compute_layout(text, words, lines, font, angle=0, add_boxes=False, add_curves=False, multiline=False):
+        """
+        Compute the size of the text content (before padding) for the selected drawing mode.
+
+        Only the measurements the mode actually uses are taken: box mode needs the
+        mean character size, multi-line text the width of every line, and skewed or
+        curved text the summed word widths.
+
+        Args:
+            text: Text to be drawn (already reordered for display)
+            words: Words of the text
+            lines: Lines of the text (a single line unless multiline is enabled)
+            font: Font object
+            angle: Skew angle in degrees
+            add_boxes: Whether the text is drawn in character boxes
+            add_curves: Whether the text is drawn with curves
+            multiline: Whether the text is drawn over multiple lines
+
+        Returns:
+            dict: content_size, text_width and text_height, plus tol, character_width
+            and character_height in box mode
+        """
+        if add_boxes:
+            tol = random.randint(10, 15) / 10
+            character_width, character_height = np.mean([character_size(font, c) for c in text], axis=0).astype(int)
+            return {
+                'content_size': (int(tol * character_width * len(text)), character_height),
+                'text_width': None,
+                'text_height': None,
+                'tol': tol,
+                'character_width': character_width,
+                'character_height': character_height,
+            }
+
+        text_width, text_height = measure_text(text, font)
+
+        if multiline:
+            # Lines are stacked with 30% spacing between them (none after the last line)
+            line_spacing = int(text_height * 0.3)
+            max_width = max(measure_text(line, font)[0] for line in lines)
+            content_size = (max_width, len(lines) * (text_height + line_spacing) - line_spacing)
+        else:
+            w = text_width
+            if angle != 0 or add_curves:
+                w = sum(measure_text(word, font)[0] for word in words)
+            h = text_height
+            if not add_curves:
+                h += int(abs(w * math.tan(math.radians(angle))))
+            content_size = (w, h)
+
+        return {'content_size': content_size, 'text_width': text_width, 'text_height': text_height}
 
     def generate(self, text, font_size=48, font_path="", background_path="", angle=0,
                 bars=True, add_random_text=True, add_boxes=True, add_curves=False,
                 apply_data_augmentation=True, white_background=True, output_path="generated_image.png",
-                multiline=False, max_line_width=1200):
+                multiline=False, max_line_width=1200, json_output_path=None):
         """
         Generate a distorted text image with various effects.
 
@@ -289,21 +475,19 @@ class GlyphScribe:
             output_path (str): Output path of the generated image
             multiline (bool): Enable multi-line text wrapping
             max_line_width (int): Maximum width in pixels for each line when multiline is enabled
+            json_output_path (str): Output path of the JSON context (default: output_path with a .json extension)
         """
         # Store original input values for context
         original_text = text
         original_font_path = font_path
         original_background_path = background_path
 
-        image = Image.new("RGB", (2000, 2000), "white")
-        draw = ImageDraw.Draw(image)
-
-        text = get_display(text)
+        text = get_display(text) if needs_bidi(text) else text
 
         if font_path == "":
             font_path = self.get_random_font_path(font_type="hw")
 
-        font = ImageFont.truetype(font_path, size=font_size)
+        font = load_font(font_path, font_size)
 
         # Handle multi-line text wrapping
         if multiline:
@@ -313,56 +497,14 @@ class GlyphScribe:
 
         words = self.extract_words(text)
 
-        # Calculate dimensions for single line (original behavior)
-        text_width, text_height = draw.textsize(text, font=font)
-
-        total_word_width = 0
-        for word in words:
-            # word_bbox = draw.textbbox((0, 0), word, font=font)
-            # word_width = word_bbox[2] - word_bbox[0]
-            # Using textsize for compatibility with Pillow < 8.0.0
-            word_width, _ = draw.textsize(word, font=font)
-            total_word_width += word_width
-
-        if add_boxes:
-            tol = random.randint(10, 15) / 10
-            character_width, character_height = np.mean([draw.textsize(c, font) for c in text], axis=0).astype(int)
-            image = Image.new("RGB", (int(tol * character_width * len(text)), character_height), "white")
-        else:
-            if multiline:
-                # Calculate dimensions for multi-line text
-                max_width = 0
-                total_height = 0
-                line_height = text_height
-                line_spacing = int(line_height * 0.3)  # 30% spacing between lines
-
-                for line in lines:
-                    line_width, _ = draw.textsize(line, font=font)
-                    max_width = max(max_width, line_width)
-                    total_height += line_height + line_spacing
-
-                # Remove extra spacing after last line
-                total_height -= line_spacing
-
-                new_w = max_width
-                new_h = total_height
-            else:
-                w = text_width
-                h = text_height
-
-                if angle != 0 or add_curves == True:
-                    w = total_word_width
-
-                angle_rad = math.radians(angle)
-                new_w = w
-                new_h = h
-                if add_curves == False:
-                    new_h = h + int(abs(w * np.tan(angle_rad)))
-
-            image = Image.new("RGB", (new_w, new_h), "white")
+        layout = self.compute_layout(text, words, lines, font, angle, add_boxes, add_curves, multiline)
+        content_size = layout['content_size']
+        text_width, text_height = layout['text_width'], layout['text_height']
 
+        # Allocate the canvas once at its padded size
         padding = tuple(random.randint(40, 40) for _ in range(4))
-        image = ImageOps.expand(image, padding, fill="white")
+        image = Image.new("RGB", (content_size[0] + padding[0] + padding[2],
+                                  content_size[1] + padding[1] + padding[3]), "white")
         image_width, image_height = image.size
 
         # Track actual background path used
@@ -371,20 +513,20 @@ class GlyphScribe:
             if background_path == "":
                 background_path = self.get_random_background_path()
             actual_background_path = background_path
-            background_image = Image.open(background_path)
-            background_image = background_image.resize((image_width, image_height))
+            background_image = load_background(background_path).resize((image_width, image_height), Image.BILINEAR)
             image.paste(background_image)
 
-        draw = ImageDraw.Draw(image)
-
         if bars:
-            self.add_bars(draw, image.size)
+            self.add_bars(image)
+
+        draw = ImageDraw.Draw(image)
 
         if add_random_text:
             self.add_random_text_overlay(draw, text, font, padding, image.size)
 
         if add_boxes:
-            self.draw_text_with_boxes(draw, text, font, padding, tol, character_width, character_height)
+            self.draw_text_with_boxes(draw, text, font, padding, layout['tol'],
+                                     layout['character_width'], layout['character_height'])
         else:
             if multiline:
                 # Draw multi-line text
@@ -397,7 +539,7 @@ class GlyphScribe:
                         (padding[0], y_offset),
                         line,
                         font=font,
-                        fill=tuple([np.random.randint(0, 100)] * 3),
+                        fill=random_gray(),
                     )
                     y_offset += line_height + line_spacing
             elif add_curves:
@@ -409,7 +551,7 @@ class GlyphScribe:
                     (padding[0], padding[1]),
                     text,
                     font=font,
-                    fill=tuple([np.random.randint(0, 100)] * 3),
+                    fill=random_gray(),
                 )
 
         if apply_data_augmentation:
@@ -418,7 +560,8 @@ class GlyphScribe:
         directory = os.path.dirname(output_path)
         os.makedirs(directory, exist_ok=True)
 
-        image.save(output_path)
+        # zlib level 1: much faster to encode than PIL's default level 6, slightly larger files
+        image.save(output_path, compress_level=1, optimize=False)
 
         # Save generation context as JSON
         context = {
@@ -440,10 +583,18 @@ class GlyphScribe:
             "max_line_width": max_line_width
         }
 
-        # Generate JSON file path by replacing image extension with .json
-        json_path = os.path.splitext(output_path)[0] + ".json"
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(context, f, indent=2, ensure_ascii=False)
+        # Write the JSON context straight to its final location
+        # (default: replace image extension with .json)
+        json_path = json_output_path or os.path.splitext(output_path)[0] + ".json"
+        json_directory = os.path.dirname(json_path)
+        if json_directory:
+            os.makedirs(json_directory, exist_ok=True)
+        if orjson is not None:
+            with open(json_path, 'wb') as f:
+                f.write(orjson.dumps(context))
+        else:
+            with open(json_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+                json.dump(context, f, ensure_ascii=False, separators=(',', ':'))
 
         print(f"Image saved to: {output_path}")
         print(f"Context saved to: {json_path}")
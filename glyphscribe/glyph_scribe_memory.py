@@ -2,8 +2,11 @@
 Modified GlyphScribe that returns images in memory instead of saving to disk.
 Used for direct Google Drive upload without local storage.
 """
-from .glyph_scribe import GlyphScribe as BaseGlyphScribe
-from PIL import Image
+from .glyph_scribe import GlyphScribe as BaseGlyphScribe, load_font, needs_bidi, random_gray, load_background
+from .augmentation import data_transformer
+from bidi.algorithm import get_display
+from PIL import Image, ImageDraw
+import random
 import json
 
 
@@ -20,28 +23,17 @@ class GlyphScribeMemory(BaseGlyphScribe):
         Returns:
             tuple: (PIL.Image, dict) - Image object and metadata dictionary
         """
-        # Import required modules
-        import random
-        from PIL import ImageDraw, ImageFont, ImageOps
-        import numpy as np
-        import math
-        from bidi.algorithm import get_display
-        from .augmentation import data_transformer
-
         # Store original input values for context
         original_text = text
         original_font_path = font_path
         original_background_path = background_path
 
-        image = Image.new("RGB", (2000, 2000), "white")
-        draw = ImageDraw.Draw(image)
-
-        text = get_display(text)
+        text = get_display(text) if needs_bidi(text) else text
 
         if font_path == "":
             font_path = self.get_random_font_path(font_type="hw")
 
-        font = ImageFont.truetype(font_path, size=font_size)
+        font = load_font(font_path, font_size)
 
         # Handle multi-line text wrapping
         if multiline:
@@ -51,52 +43,14 @@ class GlyphScribeMemory(BaseGlyphScribe):
 
         words = self.extract_words(text)
 
-        # Calculate dimensions for single line
-        text_width, text_height = draw.textsize(text, font=font)
-
-        total_word_width = 0
-        for word in words:
-            word_width, _ = draw.textsize(word, font=font)
-            total_word_width += word_width
-
-        if add_boxes:
-            tol = random.randint(10, 15) / 10
-            character_width, character_height = np.mean([draw.textsize(c, font) for c in text], axis=0).astype(int)
-            image = Image.new("RGB", (int(tol * character_width * len(text)), character_height), "white")
-        else:
-            if multiline:
-                # Calculate dimensions for multi-line text
-                max_width = 0
-                total_height = 0
-                line_height = text_height
-                line_spacing = int(line_height * 0.3)
-
-                for line in lines:
-                    line_width, _ = draw.textsize(line, font=font)
-                    max_width = max(max_width, line_width)
-                    total_height += line_height + line_spacing
-
-                total_height -= line_spacing
-
-                new_w = max_width
-                new_h = total_height
-            else:
-                w = text_width
-                h = text_height
-
-                if angle != 0 or add_curves == True:
-                    w = total_word_width
-
-                angle_rad = math.radians(angle)
-                new_w = w
-                new_h = h
-                if add_curves == False:
-                    new_h = h + int(abs(w * np.tan(angle_rad)))
-
-            image = Image.new("RGB", (new_w, new_h), "white")
+        layout = self.compute_layout(text, words, lines, font, angle, add_boxes, add_curves, multiline)
+        content_size = layout['content_size']
+        text_width, text_height = layout['text_width'], layout['text_height']
 
+        # Allocate the canvas once at its padded size
         padding = tuple(random.randint(40, 40) for _ in range(4))
-        image = ImageOps.expand(image, padding, fill="white")
+        image = Image.new("RGB", (content_size[0] + padding[0] + padding[2],
+                                  content_size[1] + padding[1] + padding[3]), "white")
         image_width, image_height = image.size
 
         # Track actual background path used
@@ -105,20 +59,20 @@ class GlyphScribeMemory(BaseGlyphScribe):
             if background_path == "":
                 background_path = self.get_random_background_path()
             actual_background_path = background_path
-            background_image = Image.open(background_path)
-            background_image = background_image.resize((image_width, image_height))
+            background_image = load_background(background_path).resize((image_width, image_height), Image.BILINEAR)
             image.paste(background_image)
 
-        draw = ImageDraw.Draw(image)
-
         if bars:
-            self.add_bars(draw, image.size)
+            self.add_bars(image)
+
+        draw = ImageDraw.Draw(image)
 
         if add_random_text:
             self.add_random_text_overlay(draw, text, font, padding, image.size)
 
         if add_boxes:
-            self.draw_text_with_boxes(draw, text, font, padding, tol, character_width, character_height)
+            self.draw_text_with_boxes(draw, text, font, padding, layout['tol'],
+                                     layout['character_width'], layout['character_height'])
         else:
             if multiline:
                 # Draw multi-line text
@@ -131,7 +85,7 @@ class GlyphScribeMemory(BaseGlyphScribe):
                         (padding[0], y_offset),
                         line,
                         font=font,
-                        fill=tuple([np.random.randint(0, 100)] * 3),
+                        fill=random_gray(),
                     )
                     y_offset += line_height + line_spacing
             elif add_curves:
@@ -143,7 +97,7 @@ class GlyphScribeMemory(BaseGlyphScribe):
                     (padding[0], padding[1]),
                     text,
                     font=font,
-                    fill=tuple([np.random.randint(0, 100)] * 3),
+                    fill=random_gray(),
                 )
 
         if apply_data_augmentation:
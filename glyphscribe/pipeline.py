@@ -0,0 +1,440 @@
+"""
+Helpers shared by the generation scripts: font discovery, dataset sampling,
+per-image task building, text shifting, and the render/upload pools.
+"""
+import os
+import hashlib
+import itertools
+import json
+import multiprocessing
+import queue
+import random
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import torch
+from PIL import Image
+from .glyph_scribe import _NONSPACE_RE, load_font
+from .glyph_scribe_memory import GlyphScribeMemory
+
+
+# Font listings are cached here, outside the font trees they describe
+FONTS_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "glyphscribe")
+
+
+def _scan_fonts(fonts_dir):
+    """
+    Walk fonts_dir once with os.scandir (symlinked directories are not followed).
+
+    Returns:
+        (font paths, {directory: mtime} for every directory visited)
+    """
+    fonts = {'.ttf': [], '.otf': []}
+    dir_mtimes = {}
+    pending = [fonts_dir]
+    while pending:
+        directory = pending.pop()
+        dir_mtimes[directory] = os.stat(directory).st_mtime
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif os.path.splitext(entry.name)[1] in fonts:
+                    fonts[os.path.splitext(entry.name)[1]].append(entry.path)
+    return fonts['.ttf'] + fonts['.otf'], dir_mtimes
+
+
+def _fonts_cache_path(resolved_dir):
+    """Path of the listing cache for a resolved fonts directory."""
+    key = hashlib.sha1(resolved_dir.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(FONTS_CACHE_DIR, f"fonts_{key}.json")
+
+
+def get_all_fonts(fonts_dir):
+    """
+    Get all font paths from the fonts directory.
+
+    The listing is cached in FONTS_CACHE_DIR, keyed on the resolved fonts_dir,
+    and reused while none of the scanned directories has changed (checked by
+    mtime). Paths are stored relative to fonts_dir and returned joined onto
+    fonts_dir as passed in, exactly as a fresh scan would return them.
+
+    Returns:
+        List of .ttf paths followed by .otf paths (empty if fonts_dir does not exist)
+    """
+    if not os.path.isdir(fonts_dir):
+        return []
+    resolved_dir = os.path.realpath(fonts_dir)
+    cache_path = _fonts_cache_path(resolved_dir)
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache['fonts_dir'] == resolved_dir and all(
+                os.stat(os.path.join(resolved_dir, d)).st_mtime <= mtime for d, mtime in cache['dirs'].items()):
+            return [os.path.join(fonts_dir, p) for p in cache['fonts']]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    font_paths, dir_mtimes = _scan_fonts(fonts_dir)
+    try:
+        os.makedirs(FONTS_CACHE_DIR, exist_ok=True)
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'fonts_dir': resolved_dir,
+                'dirs': {os.path.relpath(d, fonts_dir): mtime for d, mtime in dir_mtimes.items()},
+                'fonts': [os.path.relpath(p, fonts_dir) for p in font_paths],
+            }, f, ensure_ascii=False)
+    except OSError:
+        pass  # Unwritable cache directory; just skip caching
+    return font_paths
+
+
+# Per-process GlyphScribe instance, created by init_render_worker in each render worker
+_scribe = None
+
+
+def init_render_worker():
+    """Set up a render worker process."""
+    global _scribe
+    # One torch thread per worker; parallelism comes from the process pool
+    torch.set_num_threads(1)
+    _scribe = GlyphScribeMemory()
+
+
+def prefetch(iterable, maxsize=64):
+    """
+    Iterate over `iterable` from a background thread.
+
+    Items are buffered in a bounded queue, so fetching the next samples
+    (network I/O for a streaming dataset) overlaps with their consumption.
+
+    Args:
+        iterable: Source iterable (e.g., a streaming dataset)
+        maxsize: Maximum number of buffered items
+
+    Yields:
+        Items of `iterable` in order
+    """
+    done = object()
+    buffer = queue.Queue(maxsize=maxsize)
+
+    def producer():
+        try:
+            for item in iterable:
+                buffer.put(item)
+        except Exception as e:
+            buffer.put(e)
+        buffer.put(done)
+
+    threading.Thread(target=producer, daemon=True).start()
+    while True:
+        item = buffer.get()
+        if item is done:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def resolve_text_column(sample):
+    """
+    Pick the column holding the text, based on one sample of the dataset.
+
+    Args:
+        sample: A dataset sample (dict)
+
+    Returns:
+        Name of the text column, or None if the sample has no string column
+    """
+    for col in ['text', 'sentence', 'content', 'line']:
+        if col in sample:
+            return col
+    return next((k for k, v in sample.items() if isinstance(v, str)), None)
+
+
+def iter_words_from_text(text, min_length=2):
+    """Yield individual words from text, lazily."""
+    for match in _NONSPACE_RE.finditer(text):
+        word = match.group()
+        if len(word) >= min_length:
+            yield word
+
+
+def sample_words(samples, k, min_length=2, max_samples=None, rng=random):
+    """
+    Keep a uniform random sample of k words from a stream of dataset samples
+    (reservoir sampling), so the texts are never held in memory.
+
+    Args:
+        samples: Iterable of dataset samples (dicts sharing one schema)
+        k: Number of words to keep
+        min_length: Minimum word length to include
+        max_samples: Stop after this many samples (None reads the whole stream)
+        rng: Random source (the random module or a random.Random instance)
+
+    Returns:
+        tuple: (list of at most k words, unshuffled; words seen; samples read)
+    """
+    words = []
+    num_words = 0
+    num_samples = 0
+    text_col = None
+    for sample in itertools.islice(samples, max_samples):
+        num_samples += 1
+        if num_samples == 1:
+            # The schema is fixed, so resolve the text column once from the first sample
+            text_col = resolve_text_column(sample)
+        text = sample.get(text_col)
+
+        if text and len(text.strip()) > 0:
+            for word in iter_words_from_text(text, min_length=min_length):
+                num_words += 1
+                if len(words) < k:
+                    words.append(word)
+                else:
+                    j = rng.randrange(num_words)
+                    if j < k:
+                        words[j] = word
+    return words, num_words, num_samples
+
+
+def sample_param_tables(num_images, seed=42):
+    """
+    Draw the random generation parameters of every image up front.
+
+    Parameters come from one seeded generator, so a run is reproducible and
+    independent of the order in which tasks are built or rendered.
+
+    Args:
+        num_images: Number of images to draw parameters for
+        seed: Seed of the parameter generator
+
+    Returns:
+        Dictionary of parameter name -> NumPy array indexed by image index
+    """
+    rng = np.random.default_rng(seed)
+    return {
+        'multiline': rng.choice([True, False], size=num_images),
+        'font_size': rng.choice([40, 44, 48, 52], size=num_images),
+        'angle': rng.choice([0, 0, 0, 0, 5, -5], size=num_images),
+        'bars': rng.choice([False, False, False, True], size=num_images),
+        'apply_data_augmentation': rng.choice([True, True, False], size=num_images),
+        'white_background': rng.choice([True, True, True, True, False], size=num_images),
+    }
+
+
+def build_task(img_idx, text, font_path, max_text_length, max_line_width, param_tables):
+    """
+    Build the serializable generation task for one image.
+
+    Args:
+        img_idx: Index of the image
+        text: Text sampled from the dataset
+        font_path: Font to render with
+        max_text_length: Maximum text length for multi-line images
+        max_line_width: Maximum width per line in pixels
+        param_tables: Precomputed parameters from sample_param_tables
+
+    Returns:
+        Task dictionary with the image index, RNG seed and generation parameters
+    """
+    # Single-line or multi-line, as drawn for this image
+    is_multiline = bool(param_tables['multiline'][img_idx])
+
+    # Adjust text length based on line type
+    max_length = max_text_length if is_multiline else 80
+    if len(text) > max_length:
+        text = text[:max_length]
+
+    # Random parameters for variety
+    params = {
+        'text': text,
+        'font_size': int(param_tables['font_size'][img_idx]),
+        'font_path': font_path,
+        'background_path': "",
+        'angle': int(param_tables['angle'][img_idx]),
+        'bars': bool(param_tables['bars'][img_idx]),
+        'add_random_text': False,
+        'add_curves': False,
+        'add_boxes': False,
+        'apply_data_augmentation': bool(param_tables['apply_data_augmentation'][img_idx]),
+        'white_background': bool(param_tables['white_background'][img_idx]),
+        'multiline': is_multiline,
+        'max_line_width': max_line_width,
+    }
+
+    return {'img_idx': img_idx, 'seed': img_idx, 'params': params}
+
+
+def build_shift_table(fonts, font_sizes, dummy_word='La'):
+    """
+    Measure the shift amount for every font and font size once, up front.
+
+    The shift is 60% of the width of an invisible dummy word at center.
+
+    Args:
+        fonts: List of font paths
+        font_sizes: List of font sizes
+        dummy_word: Reference word to use as center anchor
+
+    Returns:
+        Dictionary mapping (font_path, font_size) to the shift amount in pixels,
+        or None where the font could not be measured
+    """
+    shift_table = {}
+    for font_path in fonts:
+        for font_size in font_sizes:
+            try:
+                font = load_font(font_path, font_size)
+                # Advance width from the font metrics; no drawing context needed
+                try:
+                    dummy_width = int(font.getlength(dummy_word))
+                except AttributeError:  # Pillow < 8.0 has no getlength
+                    dummy_width = font.getsize(dummy_word)[0]
+                shift_table[(font_path, font_size)] = int(dummy_width * 0.6)
+            except Exception:
+                shift_table[(font_path, font_size)] = None
+    return shift_table
+
+
+def _shift_left(pixels, shift_amount):
+    """Move the pixel columns left in place and fill the uncovered right strip with white."""
+    width = pixels.shape[1]
+    pixels[:, :width - shift_amount] = pixels[:, shift_amount:]
+    pixels[:, width - shift_amount:] = 255
+
+
+def _shift_right(pixels, shift_amount):
+    """Move the pixel columns right in place and fill the uncovered left strip with white."""
+    width = pixels.shape[1]
+    pixels[:, shift_amount:] = pixels[:, :width - shift_amount]
+    pixels[:, :shift_amount] = 255
+
+
+# Shift function per text position ('center' is left as is)
+_SHIFTS = {'left': _shift_left, 'right': _shift_right}
+
+
+def shift_text_position(image, position='center', shift_amount=None):
+    """
+    Shift the text position relative to an invisible dummy word at center.
+    Works with PIL Image objects in memory.
+
+    Args:
+        image: PIL Image object
+        position: Text position - 'left', 'center', or 'right'
+        shift_amount: Shift in pixels (see build_shift_table); None falls back to
+            60% of a quarter of the image width
+
+    Returns:
+        PIL Image object (shifted)
+    """
+    shift = _SHIFTS.get(position)
+    if shift is None:
+        return image
+
+    width, height = image.size
+
+    if shift_amount is None:
+        shift_amount = int(int(width * 0.25) * 0.6)
+
+    shift_amount = min(shift_amount, width)
+    if shift_amount <= 0:
+        return image
+
+    # Shift the pixels in a single copy of the image and fill the uncovered columns with white
+    pixels = np.array(image)
+    shift(pixels, shift_amount)
+
+    return Image.fromarray(pixels)
+
+
+def worker_context():
+    """
+    Multiprocessing context for worker pools.
+
+    Workers are started with forkserver (spawn where it is unavailable) rather
+    than fork: the scripts run background threads (dataset prefetch and
+    streaming, uploads) that may hold locks or sockets when a pool starts its
+    workers, and a forked child can deadlock on such a lock.
+
+    Returns:
+        multiprocessing context
+    """
+    start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(start_method)
+
+
+def create_render_pool(max_workers):
+    """
+    Create the process pool rendering images with init_render_worker.
+
+    Args:
+        max_workers: Number of render processes
+
+    Returns:
+        ProcessPoolExecutor
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, initializer=init_render_worker,
+                               mp_context=worker_context())
+
+
+def generate_one(task):
+    """
+    Render one image in a worker process.
+
+    RNGs are seeded from the task so each image is reproducible regardless of
+    which worker renders it.
+
+    Args:
+        task: Task dictionary from build_task
+
+    Returns:
+        tuple: (PIL.Image, dict) - Image object and metadata dictionary
+    """
+    random.seed(task['seed'])
+    np.random.seed(task['seed'])
+    torch.manual_seed(task['seed'])
+    return _scribe.generate_to_memory(**task['params'])
+
+
+def render_in_order(pool, tasks, window, render=generate_one):
+    """
+    Submit tasks to the render pool, yielding (task, future) in submission order.
+
+    At most `window` renders are in flight, which bounds memory held by
+    finished images that have not been handed off yet.
+
+    Args:
+        pool: ProcessPoolExecutor set up with init_render_worker
+        tasks: Iterable of tasks (e.g., from build_task)
+        window: Maximum number of pending renders
+        render: Picklable function rendering one task (default: generate_one)
+    """
+    pending = deque()
+    for task in tasks:
+        pending.append((task, pool.submit(render, task)))
+        if len(pending) >= window:
+            yield pending.popleft()
+    while pending:
+        yield pending.popleft()
+
+
+def submit_upload(pool, slots, fn, *args):
+    """
+    Submit an upload to the pool, blocking while all in-flight slots are taken.
+
+    Args:
+        pool: ThreadPoolExecutor running the uploads
+        slots: Semaphore bounding the number of pending uploads
+        fn: Upload function
+        *args: Arguments for the upload function
+
+    Returns:
+        Future for the upload
+    """
+    slots.acquire()
+    future = pool.submit(fn, *args)
+    future.add_done_callback(lambda _: slots.release())
+    return future
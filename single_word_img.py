@@ -2,86 +2,40 @@
 Single-word image generation script with Google Drive upload.
 Generates clean single-word images and uploads directly to Google Drive without local storage.
 """
+import os
 import random
-import re
-from pathlib import Path
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
-from glyphscribe.glyph_scribe_memory import GlyphScribeMemory
+from glyphscribe.pipeline import (
+    build_shift_table, get_all_fonts, iter_words_from_text, shift_text_position,
+    create_render_pool, generate_one, render_in_order, submit_upload,
+)
 from datasets import load_dataset
-from PIL import Image, ImageDraw, ImageFont
 from gdrive_uploader import GDriveUploader
 
 
-def get_all_fonts(fonts_dir):
-    """Get all font paths from the fonts directory."""
-    font_paths = []
-    for ext in ['*.ttf', '*.otf']:
-        font_paths.extend(Path(fonts_dir).rglob(ext))
-    return [str(p) for p in font_paths]
-
-
-def extract_words_from_text(text, min_length=2):
+def generate_single_word(task):
     """
-    Extract individual words from text.
+    Render and position one single-word image in a worker process.
 
     Args:
-        text: Input text string
-        min_length: Minimum word length to include
+        task: Task dictionary with the image index, RNG seed, generation
+            parameters, text position and shift amount
 
     Returns:
-        List of words filtered by minimum length
+        tuple: (PIL.Image, dict) - Image object and metadata dictionary
     """
-    # Split by whitespace and filter out empty strings
-    words = re.findall(r'\S+', text)
-    # Filter by minimum length
-    words = [w for w in words if len(w) >= min_length]
-    return words
-
-
-def shift_text_position(image, position='center', dummy_word='La', font_size=48, font_path=''):
-    """
-    Shift the text position relative to an invisible dummy word at center.
-    Works with PIL Image objects in memory.
-
-    Args:
-        image: PIL Image object
-        position: Text position - 'left', 'center', or 'right'
-        dummy_word: Reference word to use as center anchor
-        font_size: Font size for measuring dummy word width
-        font_path: Font path for measuring dummy word width
-
-    Returns:
-        PIL Image object (shifted)
-    """
-    if position == 'center':
-        return image
-
-    width, height = image.size
-
-    # Calculate the width of the dummy word
-    temp_img = Image.new("RGB", (1, 1), "white")
-    draw = ImageDraw.Draw(temp_img)
-
-    if font_path:
-        try:
-            font = ImageFont.truetype(font_path, size=font_size)
-            dummy_width, _ = draw.textsize(dummy_word, font=font)
-        except:
-            dummy_width = int(width * 0.25)
-    else:
-        dummy_width = int(width * 0.25)
+    # Generate image in memory (seeded from the task, see generate_one)
+    image, metadata = generate_one(task)
 
-    shift_amount = int(dummy_width * 0.6)
+    # Apply position shifting in memory
+    image = shift_text_position(image, position=task['text_position'], shift_amount=task['shift_amount'])
 
-    # Create a new white canvas
-    new_img = Image.new("RGB", (width, height), "white")
+    # Add position info to metadata
+    metadata['text_position'] = task['text_position']
 
-    if position == 'left':
-        new_img.paste(image.crop((shift_amount, 0, width, height)), (0, 0))
-    elif position == 'right':
-        new_img.paste(image.crop((0, 0, width - shift_amount, height)), (shift_amount, 0))
-
-    return new_img
+    return image, metadata
 
 
 def main():
@@ -89,9 +43,13 @@ def main():
     NUM_SAMPLES = 10000
     NUM_IMAGES = 10000
     FONTS_DIR = "bangla_fonts"
+    FONT_SIZES = [36, 40, 44, 48, 52, 56]
     MIN_WORD_LENGTH = 2
     DUMMY_WORD = 'La'
     GDRIVE_FOLDER = "GlyphScribe_Output"
+    RENDER_WORKERS = os.cpu_count()  # Image synthesis processes
+    UPLOAD_WORKERS = 16  # Concurrent uploads overlapping with generation
+    MAX_IN_FLIGHT = 64  # Pending uploads before generation waits (bounds queued images in memory)
 
     print("="*60)
     print("GlyphScribe Single-Word Generator (Google Drive)")
@@ -100,7 +58,8 @@ def main():
     # Initialize Google Drive uploader
     print("\n[1/6] Connecting to Google Drive...")
     try:
-        uploader = GDriveUploader(folder_name=GDRIVE_FOLDER)
+        uploader = GDriveUploader(folder_name=GDRIVE_FOLDER,
+                                  folder_paths=["single_words/images", "single_words/json"])
         print(f"✓ Connected to Google Drive")
         print(f"  Folder URL: {uploader.get_folder_url()}")
     except Exception as e:
@@ -116,15 +75,16 @@ def main():
     ds = load_dataset("hishab/titulm-bangla-corpus", "default", streaming=True)
     dataset_stream = ds['train'] if 'train' in ds else ds[list(ds.keys())[0]]
 
-    # Sample texts from dataset
-    print(f"✓ Sampling {NUM_SAMPLES} texts from dataset...")
-    dataset = list(dataset_stream.shuffle(seed=42, buffer_size=10000).take(NUM_SAMPLES))
-    print(f"✓ Loaded {len(dataset)} samples")
+    # Sample texts from dataset (streamed; stops early once enough words are collected)
+    print(f"✓ Sampling up to {NUM_SAMPLES} texts from dataset...")
+    samples = dataset_stream.shuffle(seed=42, buffer_size=10000).take(NUM_SAMPLES)
 
-    # Extract all words from dataset
+    # Extract words from the streamed texts, keeping a pool of twice the needed words to shuffle from
     print("\n[3/6] Extracting words from texts...")
     all_words = []
-    for sample in dataset:
+    num_samples = 0
+    for sample in samples:
+        num_samples += 1
         text = None
         for col in ['text', 'sentence', 'content', 'line']:
             if col in sample:
@@ -135,10 +95,12 @@ def main():
             text = next((v for v in sample.values() if isinstance(v, str)), None)
 
         if text and len(text.strip()) > 0:
-            words = extract_words_from_text(text, min_length=MIN_WORD_LENGTH)
-            all_words.extend(words)
+            all_words.extend(iter_words_from_text(text, min_length=MIN_WORD_LENGTH))
+
+        if len(all_words) >= NUM_IMAGES * 2:
+            break
 
-    print(f"✓ Extracted {len(all_words)} words")
+    print(f"✓ Extracted {len(all_words)} words from {num_samples} samples")
 
     # Shuffle and limit to NUM_IMAGES
     random.seed(42)
@@ -151,73 +113,82 @@ def main():
     fonts = get_all_fonts(FONTS_DIR)
     print(f"✓ Found {len(fonts)} fonts")
 
-    # Initialize GlyphScribe
-    print("\n[5/6] Initializing GlyphScribe...")
-    scribe = GlyphScribeMemory()
-    print("✓ Ready")
+    # Measure the dummy word once per font and size instead of once per image
+    shift_table = build_shift_table(fonts, FONT_SIZES, DUMMY_WORD)
+
+    # Build generation tasks
+    print("\n[5/6] Preparing generation tasks...")
+    tasks = []
+    for img_idx, word in enumerate(all_words):
+        # Cycle through all fonts
+        font_path = fonts[img_idx % len(fonts)]
+        font_size = random.choice(FONT_SIZES)
+
+        # Parameters for generation
+        generation_params = {
+            'text': word,
+            'font_size': font_size,
+            'font_path': font_path,
+            'background_path': "",
+            'angle': 5,
+            'bars': True,
+            'add_random_text': True,
+            'add_boxes': False,
+            'add_curves': True,
+            'apply_data_augmentation': True,
+            'white_background': True,
+        }
+
+        tasks.append({
+            'img_idx': img_idx,
+            'seed': img_idx,
+            'params': generation_params,
+            # Randomly select text position
+            'text_position': random.choice(['left', 'center', 'right']),
+            'shift_amount': shift_table[(font_path, font_size)],
+        })
+    print(f"✓ {len(tasks)} tasks ready")
 
     # Generate and upload images
-    print(f"\n[6/6] Generating and uploading {len(all_words)} single-word images to Google Drive...\n")
+    print(f"\n[6/6] Generating and uploading {len(all_words)} single-word images to Google Drive "
+          f"({RENDER_WORKERS} render workers)...\n")
 
-    successful = 0
     failed = 0
-
-    for img_idx, word in enumerate(tqdm(all_words, desc="Progress")):
-        try:
-            # Cycle through all fonts
-            font_path = fonts[img_idx % len(fonts)]
-
-            # Output filenames
-            image_filename = f"image_{img_idx:06d}.png"
-            json_filename = f"image_{img_idx:06d}.json"
-
-            # Select font size
-            selected_font_size = random.choice([36, 40, 44, 48, 52, 56])
-
-            # Parameters for generation
-            generation_params = {
-                'text': word,
-                'font_size': selected_font_size,
-                'font_path': font_path,
-                'background_path': "",
-                'angle': 5,
-                'bars': True,
-                'add_random_text': True,
-                'add_boxes': False,
-                'add_curves': True,
-                'apply_data_augmentation': True,
-                'white_background': True,
-            }
-
-            # Generate image in memory
-            image, metadata = scribe.generate_to_memory(**generation_params)
-
-            # Randomly select text position
-            text_position = random.choice(['left', 'center', 'right'])
-
-            # Apply position shifting in memory
-            image = shift_text_position(
-                image,
-                position=text_position,
-                dummy_word=DUMMY_WORD,
-                font_size=selected_font_size,
-                font_path=font_path
-            )
-
-            # Add position info to metadata
-            metadata['text_position'] = text_position
-
-            # Upload image to Google Drive
-            uploader.upload_image(image, image_filename, folder_path="single_words/images")
-
-            # Upload JSON metadata to Google Drive
-            uploader.upload_json(metadata, json_filename, folder_path="single_words/json")
-
-            successful += 1
-
-        except Exception as e:
-            tqdm.write(f"Error at {img_idx} (word: '{word}'): {e}")
-            failed += 1
+    upload_futures = {}  # Future -> image index
+    upload_slots = threading.BoundedSemaphore(MAX_IN_FLIGHT)
+
+    with create_render_pool(RENDER_WORKERS) as render_pool, \
+            ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as upload_pool:
+        renders = render_in_order(render_pool, tasks, RENDER_WORKERS * 4, render=generate_single_word)
+        for task, render in tqdm(renders, total=len(tasks), desc="Progress"):
+            img_idx = task['img_idx']
+            try:
+                image, metadata = render.result()
+
+                # Output filenames
+                image_filename = f"image_{img_idx:06d}.png"
+                json_filename = f"image_{img_idx:06d}.json"
+
+                # Upload the image, then its JSON metadata, to Google Drive in the background
+                upload_futures[submit_upload(
+                    upload_pool, upload_slots, uploader.upload_image_with_json, image, metadata,
+                    image_filename, json_filename, "single_words/images", "single_words/json")] = img_idx
+
+            except Exception as e:
+                tqdm.write(f"Error at {img_idx} (word: '{task['params']['text']}'): {e}")
+                failed += 1
+
+        # Wait for in-flight uploads and count images whose uploads succeeded
+        failed_uploads = 0
+        for future in as_completed(upload_futures):
+            try:
+                future.result()
+            except Exception as e:
+                tqdm.write(f"Upload error at {upload_futures[future]}: {e}")
+                failed_uploads += 1
+
+    successful = len(upload_futures) - failed_uploads
+    failed += failed_uploads
 
     # Summary
     print("\n" + "="*60)
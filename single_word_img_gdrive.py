@@ -2,76 +2,80 @@
 Single-word image generation script with direct Google Drive upload.
 Generates clean single-word images and uploads them directly to Google Drive without local storage.
 """
+import os
 import random
-import re
-from pathlib import Path
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
 from tqdm import tqdm
 from glyphscribe.glyph_scribe_memory import GlyphScribeMemory
+from glyphscribe.pipeline import build_shift_table, get_all_fonts, sample_words, shift_text_position, worker_context
 from datasets import load_dataset
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image
 from gdrive_uploader import GDriveUploader
 import io
 
 
-def get_all_fonts(fonts_dir):
-    """Get all font paths from the fonts directory."""
-    font_paths = []
-    for ext in ['*.ttf', '*.otf']:
-        font_paths.extend(Path(fonts_dir).rglob(ext))
-    return [str(p) for p in font_paths]
-
-
-def extract_words_from_text(text, min_length=2):
-    """Extract individual words from text."""
-    words = re.findall(r'\S+', text)
-    words = [w for w in words if len(w) >= min_length]
-    return words
-
-
-def shift_text_position(image, position='center', dummy_word='La', font_size=48, font_path=''):
+def _encode_png(raw_bytes, size, mode):
     """
-    Shift the text position relative to an invisible dummy word at center.
-    Works with PIL Image objects in memory.
+    Encode raw image pixels as PNG in an encoder process.
 
     Args:
-        image: PIL Image object
-        position: Text position - 'left', 'center', or 'right'
-        dummy_word: Reference word to use as center anchor
-        font_size: Font size for measuring dummy word width
-        font_path: Font path for measuring dummy word width
+        raw_bytes: Pixel data from Image.tobytes()
+        size: Image size (width, height)
+        mode: Image mode (e.g., "L" or "RGB")
 
     Returns:
-        PIL Image object (shifted)
+        PNG file content as bytes
     """
-    if position == 'center':
-        return image
-
-    width, height = image.size
+    buffer = io.BytesIO()
+    # zlib level 1: much faster to encode than PIL's default level 6, slightly larger files
+    Image.frombytes(mode, size, raw_bytes).save(buffer, "PNG", optimize=False, compress_level=1)
+    return buffer.getvalue()
 
-    # Calculate the width of the dummy word
-    temp_img = Image.new("RGB", (1, 1), "white")
-    draw = ImageDraw.Draw(temp_img)
 
-    if font_path:
-        try:
-            font = ImageFont.truetype(font_path, size=font_size)
-            dummy_width, _ = draw.textsize(dummy_word, font=font)
-        except:
-            dummy_width = int(width * 0.25)
-    else:
-        dummy_width = int(width * 0.25)
+def flush_uploads(uploader, pending_uploads):
+    """
+    Upload the pending images as one batch, then the JSON files of those that succeeded.
 
-    shift_amount = int(dummy_width * 0.6)
+    PNG encodes still running in the encoder pool are waited for here, in the
+    upload thread, so generation never blocks on encoding. A JSON file is only
+    uploaded once its image made it to Drive, so failures never leave orphaned
+    metadata behind.
 
-    # Create a new white canvas
-    new_img = Image.new("RGB", (width, height), "white")
+    Args:
+        uploader: GDriveUploader instance
+        pending_uploads: List of (img_idx, kind, content, filename, folder_path) tuples;
+            the content of "png" items is a Future resolving to the PNG bytes
 
-    if position == 'left':
-        new_img.paste(image.crop((shift_amount, 0, width, height)), (0, 0))
-    elif position == 'right':
-        new_img.paste(image.crop((0, 0, width - shift_amount, height)), (shift_amount, 0))
+    Returns:
+        Set of image indices with at least one failed upload
+    """
+    failed_uploads = set()
+
+    def report(img_idx, error):
+        if img_idx not in failed_uploads:
+            tqdm.write(f"Upload error at {img_idx}: {error}")
+        failed_uploads.add(img_idx)
+
+    def upload(items):
+        batch = [item[1:] for item in items]
+        for (img_idx, *_), result in zip(items, uploader.batch_upload(batch)):
+            if isinstance(result, Exception):
+                report(img_idx, result)
+
+    images = []
+    for img_idx, kind, content, filename, folder_path in pending_uploads:
+        if kind != 'png':
+            continue
+        try:
+            images.append((img_idx, kind, content.result(), filename, folder_path))
+        except Exception as e:
+            report(img_idx, e)
+    upload(images)
 
-    return new_img
+    upload([item for item in pending_uploads if item[1] != 'png' and item[0] not in failed_uploads])
+    return failed_uploads
 
 
 def main():
@@ -79,9 +83,14 @@ def main():
     NUM_SAMPLES = 10
     NUM_IMAGES = 10
     FONTS_DIR = "bangla_fonts"
+    FONT_SIZES = [36, 40, 44, 48, 52, 56]
     MIN_WORD_LENGTH = 2
     DUMMY_WORD = 'La'
     GDRIVE_FOLDER = "GlyphScribe_Output"
+    UPLOAD_BATCH_SIZE = 16  # Images (image + JSON pairs) uploaded per batch
+    ENCODE_WORKERS = os.cpu_count()  # PNG encoder processes (encoding runs outside the GIL)
+    UPLOAD_WORKERS = 8  # Batches uploading concurrently in the background while generation continues
+    MAX_PENDING_BATCHES = 2 * UPLOAD_WORKERS  # Queued batches before generation waits (bounds queued images in memory)
 
     print("="*60)
     print("GlyphScribe Single-Word Generator (Google Drive)")
@@ -90,7 +99,8 @@ def main():
     # Initialize Google Drive uploader
     print("\n[1/6] Connecting to Google Drive...")
     try:
-        uploader = GDriveUploader(folder_name=GDRIVE_FOLDER)
+        uploader = GDriveUploader(folder_name=GDRIVE_FOLDER,
+                                  folder_paths=["single_words/images", "single_words/json"])
         print(f"✓ Connected to Google Drive")
         print(f"  Folder URL: {uploader.get_folder_url()}")
     except Exception as e:
@@ -105,34 +115,19 @@ def main():
     ds = load_dataset("hishab/titulm-bangla-corpus", "default", streaming=True)
     dataset_stream = ds['train'] if 'train' in ds else ds[list(ds.keys())[0]]
 
-    # Sample texts from dataset
+    # Sample texts from dataset (streamed straight into word extraction, never held in memory)
     print(f"✓ Sampling {NUM_SAMPLES} texts from dataset...")
-    dataset = list(dataset_stream.shuffle(seed=42, buffer_size=10000).take(NUM_SAMPLES))
-    print(f"✓ Loaded {len(dataset)} samples")
+    samples = dataset_stream.shuffle(seed=42, buffer_size=10000)
 
-    # Extract all words from dataset
+    # Extract words from dataset, keeping a uniform random sample of NUM_IMAGES of them (reservoir sampling)
     print("\n[3/6] Extracting words from texts...")
-    all_words = []
-    for sample in dataset:
-        text = None
-        for col in ['text', 'sentence', 'content', 'line']:
-            if col in sample:
-                text = sample[col]
-                break
-
-        if not text:
-            text = next((v for v in sample.values() if isinstance(v, str)), None)
-
-        if text and len(text.strip()) > 0:
-            words = extract_words_from_text(text, min_length=MIN_WORD_LENGTH)
-            all_words.extend(words)
-
-    print(f"✓ Extracted {len(all_words)} words")
-
-    # Shuffle and limit to NUM_IMAGES
     random.seed(42)
+    all_words, num_words, num_samples = sample_words(
+        samples, NUM_IMAGES, min_length=MIN_WORD_LENGTH, max_samples=NUM_SAMPLES)
+    print(f"✓ Extracted {num_words} words from {num_samples} samples")
+
+    # Shuffle the sample (the reservoir keeps stream order)
     random.shuffle(all_words)
-    all_words = all_words[:NUM_IMAGES]
     print(f"✓ Using {len(all_words)} words for generation")
 
     # Get all fonts
@@ -140,73 +135,98 @@ def main():
     fonts = get_all_fonts(FONTS_DIR)
     print(f"✓ Found {len(fonts)} fonts")
 
+    # Measure the dummy word once per font and size
+    shift_table = build_shift_table(fonts, FONT_SIZES, DUMMY_WORD)
+
     # Initialize GlyphScribe
     print("\n[5/6] Initializing GlyphScribe...")
     scribe = GlyphScribeMemory()
     print("✓ Ready")
 
+    # Draw the font size and text position of every word at once
+    rng = np.random.default_rng(42)
+    font_sizes = rng.choice(FONT_SIZES, size=len(all_words)).tolist()
+    text_positions = rng.choice(['left', 'center', 'right'], size=len(all_words)).tolist()
+
     # Generate and upload images
     print(f"\n[6/6] Generating and uploading {len(all_words)} single-word images to Google Drive...\n")
 
-    successful = 0
+    generated = 0
     failed = 0
-
-    for img_idx, word in enumerate(tqdm(all_words, desc="Progress")):
-        try:
-            # Cycle through all fonts
-            font_path = fonts[img_idx % len(fonts)]
-
-            # Output filenames
-            image_filename = f"image_{img_idx:06d}.png"
-            json_filename = f"image_{img_idx:06d}.json"
-
-            # Select font size
-            selected_font_size = random.choice([36, 40, 44, 48, 52, 56])
-
-            # Parameters for generation
-            generation_params = {
-                'text': word,
-                'font_size': selected_font_size,
-                'font_path': font_path,
-                'background_path': "",
-                'angle': 5,
-                'bars': True,
-                'add_random_text': True,
-                'add_boxes': False,
-                'add_curves': True,
-                'apply_data_augmentation': True,
-                'white_background': True,
-            }
-
-            # Generate image in memory
-            image, metadata = scribe.generate_to_memory(**generation_params)
-
-            # Randomly select text position
-            text_position = random.choice(['left', 'center', 'right'])
-
-            # Apply position shifting in memory
-            image = shift_text_position(
-                image,
-                position=text_position,
-                dummy_word=DUMMY_WORD,
-                font_size=selected_font_size,
-                font_path=font_path
-            )
-
-            # Add position info to metadata
-            metadata['text_position'] = text_position
-
-            # Upload image to Google Drive
-            uploader.upload_image(image, image_filename, folder_path="single_words/images")
-
-            # Upload JSON metadata to Google Drive
-            uploader.upload_json(metadata, json_filename, folder_path="single_words/json")
-
-            successful += 1
-
-        except Exception as e:
-            tqdm.write(f"Error at {img_idx} (word: '{word}'): {e}")
-            failed += 1
+    pending_uploads = []
+    failed_uploads = set()
+
+    batch_futures = deque()
+
+    with ProcessPoolExecutor(max_workers=ENCODE_WORKERS, mp_context=worker_context()) as encode_pool, \
+            ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as upload_pool:
+        for img_idx, word in enumerate(tqdm(all_words, desc="Progress")):
+            try:
+                # Cycle through all fonts
+                font_path = fonts[img_idx % len(fonts)]
+
+                # Output filenames
+                image_filename = f"image_{img_idx:06d}.png"
+                json_filename = f"image_{img_idx:06d}.json"
+
+                # Select font size
+                selected_font_size = font_sizes[img_idx]
+
+                # Parameters for generation
+                generation_params = {
+                    'text': word,
+                    'font_size': selected_font_size,
+                    'font_path': font_path,
+                    'background_path': "",
+                    'angle': 5,
+                    'bars': True,
+                    'add_random_text': True,
+                    'add_boxes': False,
+                    'add_curves': True,
+                    'apply_data_augmentation': True,
+                    'white_background': True,
+                }
+
+                # Generate image in memory
+                image, metadata = scribe.generate_to_memory(**generation_params)
+
+                # Randomly selected text position
+                text_position = text_positions[img_idx]
+
+                # Apply position shifting in memory
+                image = shift_text_position(
+                    image,
+                    position=text_position,
+                    shift_amount=shift_table[(font_path, selected_font_size)]
+                )
+
+                # Add position info to metadata
+                metadata['text_position'] = text_position
+
+                # Encode the PNG in the encoder pool and queue it with the JSON metadata for the next batch upload
+                png = encode_pool.submit(_encode_png, image.tobytes(), image.size, image.mode)
+                pending_uploads.append((img_idx, 'png', png, image_filename, "single_words/images"))
+                pending_uploads.append((img_idx, 'json', metadata, json_filename, "single_words/json"))
+                generated += 1
+
+            except Exception as e:
+                tqdm.write(f"Error at {img_idx} (word: '{word}'): {e}")
+                failed += 1
+
+            if len(pending_uploads) >= 2 * UPLOAD_BATCH_SIZE:
+                # Upload the batch in the background and keep generating
+                batch_futures.append(upload_pool.submit(flush_uploads, uploader, pending_uploads))
+                pending_uploads = []
+                if len(batch_futures) >= MAX_PENDING_BATCHES:
+                    failed_uploads |= batch_futures.popleft().result()
+
+        # Upload the last partial batch and wait for the batches still in flight
+        batch_futures.append(upload_pool.submit(flush_uploads, uploader, pending_uploads))
+        for future in batch_futures:
+            failed_uploads |= future.result()
+
+    successful = generated - len(failed_uploads)
+    failed += len(failed_uploads)
 
     # Summary
     print("\n" + "="*60)
@@ -1,5 +1,5 @@
 """Test the dummy word positioning logic"""
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageFont
 
 def test_shift():
     image_path = "out/single_words/images/image_000006.png"
@@ -14,12 +14,12 @@ def test_shift():
     print(f"Image size: {width}x{height}")
 
     # Calculate dummy word width
-    temp_img = Image.new("RGB", (1, 1), "white")
-    draw = ImageDraw.Draw(temp_img)
-
     try:
         font = ImageFont.truetype(font_path, size=font_size)
-        dummy_width, _ = draw.textsize(dummy_word, font=font)
+        try:
+            dummy_width = int(font.getlength(dummy_word))
+        except AttributeError:  # Pillow < 8.0 has no getlength
+            dummy_width = font.getsize(dummy_word)[0]
         print(f"Dummy word '{dummy_word}' width: {dummy_width}px at font size {font_size}")
     except Exception as e:
         print(f"Font loading error: {e}")
@@ -1,5 +1,6 @@
 """Quick test to verify the shift function works"""
 from PIL import Image
+import numpy as np
 
 def shift_text_position(image_path, position='center', shift_percentage=0.25):
     """Shift the text position in the image relative to center."""
@@ -9,16 +10,20 @@ def shift_text_position(image_path, position='center', shift_percentage=0.25):
     img = Image.open(image_path)
     width, height = img.size
     shift_amount = int(width * shift_percentage)
-    new_img = Image.new("RGB", (width, height), "white")
 
+    # Shift the pixels of one RGB copy and fill only the uncovered strip with white
+    # (no separately allocated and cleared white canvas)
+    pixels = np.array(img if img.mode == "RGB" else img.convert("RGB"))
     if position == 'left':
-        cropped = img.crop((shift_amount, 0, width, height))
-        new_img.paste(cropped, (0, 0))
+        pixels[:, :width - shift_amount] = pixels[:, shift_amount:]
+        pixels[:, width - shift_amount:] = 255
     elif position == 'right':
-        cropped = img.crop((0, 0, width - shift_amount, height))
-        new_img.paste(cropped, (shift_amount, 0))
+        pixels[:, shift_amount:] = pixels[:, :width - shift_amount]
+        pixels[:, :shift_amount] = 255
+    else:
+        pixels[:] = 255
 
-    new_img.save(image_path)
+    Image.fromarray(pixels).save(image_path)
 
 # Test on the image you mentioned
 test_image = "out/single_words/images/image_000098.png"
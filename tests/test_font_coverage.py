@@ -5,11 +5,27 @@ This module tests whether all available fonts are being used
 during batch image generation by analyzing JSON metadata files.
 """
 import json
+import os
 from pathlib import Path
 from collections import Counter
-from typing import List, Set, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Set, Dict, Iterable, Iterator
 import pytest
 
+from glyphscribe.pipeline import get_all_fonts
+
+try:
+    import orjson
+except ImportError:  # Optional; falls back to the stdlib json decoder
+    orjson = None
+
+
+def _json_loads(data: bytes):
+    """Parse JSON file content (bytes), with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 
 class FontAnalyzer:
     """Analyzer for font usage in generated images."""
@@ -22,61 +38,81 @@ class FontAnalyzer:
             fonts_dir: Path to directory containing font files
         """
         self.fonts_dir = Path(fonts_dir)
+        self._all_fonts = None  # Filled by the first get_all_fonts call
 
     def get_all_fonts(self) -> Set[str]:
         """
         Get all font filenames from the fonts directory.
 
+        The directory is walked once per FontAnalyzer; later calls reuse the result.
+
         Returns:
             Set of font filenames
         """
-        font_paths = []
-        for ext in ['*.ttf', '*.otf']:
-            font_paths.extend(self.fonts_dir.rglob(ext))
-        return {path.name for path in font_paths}
+        if self._all_fonts is None:
+            self._all_fonts = {os.path.basename(path) for path in get_all_fonts(str(self.fonts_dir))}
+        return self._all_fonts
 
-    def get_used_fonts(self, json_dir: str) -> List[str]:
+    def load_json_records(self, json_dir: str, max_workers: int = 32) -> List[Dict]:
         """
-        Extract used fonts from JSON metadata files.
+        Parse every JSON metadata file once.
+
+        Files are read on a thread pool so the many small reads overlap.
 
         Args:
             json_dir: Path to directory containing JSON metadata
+            max_workers: Number of reader threads
 
         Returns:
-            List of font filenames used in generation
+            List of parsed JSON metadata dictionaries
         """
-        json_path = Path(json_dir)
-        used_fonts = []
-
-        for json_file in json_path.glob("*.json"):
+        def parse(json_file):
             try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    font_used = data.get('font_path_used', '')
-                    if font_used:
-                        used_fonts.append(Path(font_used).name)
+                return _json_loads(json_file.read_bytes()), None
             except (json.JSONDecodeError, IOError) as e:
-                pytest.fail(f"Failed to read {json_file}: {e}")
+                return None, f"Failed to read {json_file}: {e}"
+
+        json_path = Path(json_dir)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(parse, json_path.glob("*.json")))
 
-        return used_fonts
+        errors = [error for _, error in results if error]
+        if errors:
+            pytest.fail("\n".join(errors))
 
-    def calculate_coverage(self, all_fonts: Set[str], used_fonts: List[str]) -> Dict:
+        return [data for data, _ in results]
+
+    def get_used_fonts(self, records: List[Dict]) -> Iterator[str]:
+        """
+        Extract used fonts from parsed JSON metadata.
+
+        Args:
+            records: Parsed JSON metadata dictionaries (see load_json_records)
+
+        Yields:
+            Font filename used for each generated image
+        """
+        for data in records:
+            font_used = data.get('font_path_used', '')
+            if font_used:
+                yield Path(font_used).name
+
+    def calculate_coverage(self, all_fonts: Set[str], used_fonts: Iterable[str]) -> Dict:
         """
         Calculate font coverage statistics.
 
         Args:
             all_fonts: Set of all available fonts
-            used_fonts: List of fonts used in generation
+            used_fonts: Fonts used in generation, one entry per image (consumed once)
 
         Returns:
             Dictionary containing coverage statistics
         """
-        used_font_set = set(used_fonts)
+        font_counts = Counter(used_fonts)
+        used_font_set = set(font_counts)
         unused_fonts = all_fonts - used_font_set
         coverage_percent = (len(used_font_set) / len(all_fonts) * 100) if all_fonts else 0
 
-        font_counts = Counter(used_fonts)
-
         return {
             'total_fonts': len(all_fonts),
             'used_fonts': len(used_font_set),
@@ -108,10 +144,16 @@ def font_analyzer(fonts_dir):
 
 
 @pytest.fixture(scope="session")
-def coverage_stats(font_analyzer, json_dir):
+def parsed_json(font_analyzer, json_dir):
+    """Fixture providing every JSON metadata file, parsed once per session."""
+    return font_analyzer.load_json_records(json_dir)
+
+
+@pytest.fixture(scope="session")
+def coverage_stats(font_analyzer, parsed_json):
     """Fixture providing font coverage statistics."""
     all_fonts = font_analyzer.get_all_fonts()
-    used_fonts = font_analyzer.get_used_fonts(json_dir)
+    used_fonts = font_analyzer.get_used_fonts(parsed_json)
     return font_analyzer.calculate_coverage(all_fonts, used_fonts)
 
 
@@ -153,8 +195,7 @@ class TestJSONMetadata:
         assert len(json_files) > 0, "No JSON files to test"
 
         # Test first JSON file
-        with open(json_files[0], 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = _json_loads(json_files[0].read_bytes())
 
         required_fields = ['font_path_used', 'text', 'font_size', 'output_path']
         for field in required_fields:
@@ -213,15 +254,9 @@ class TestGenerationQuality:
             f"{total_fonts} to potentially cover all fonts"
         )
 
-    def test_no_duplicate_processing(self, json_dir):
+    def test_no_duplicate_processing(self, parsed_json):
         """Test that there are no duplicate output paths in JSON files."""
-        json_files = list(Path(json_dir).glob("*.json"))
-        output_paths = []
-
-        for json_file in json_files:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                output_paths.append(data.get('output_path', ''))
+        output_paths = [data.get('output_path', '') for data in parsed_json]
 
         unique_paths = set(output_paths)
         assert len(output_paths) == len(unique_paths), (
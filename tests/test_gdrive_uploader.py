@@ -0,0 +1,130 @@
+"""
+Tests for resolving Google Drive folder paths in GDriveUploader.
+
+Drive is replaced by an in-memory fake, so no credentials or network are needed.
+"""
+import itertools
+import pytest
+
+from gdrive_uploader import GDriveUploader
+
+
+class FakeFile(dict):
+    """Stand-in for a pydrive2 GoogleDriveFile created with drive.CreateFile."""
+
+    def __init__(self, drive, metadata):
+        super().__init__(metadata)
+        self.drive = drive
+
+    def Upload(self):
+        self['id'] = f"id{next(self.drive.ids)}"
+        self.drive.folders.append(self)
+
+
+class FakeList:
+    """Stand-in for the result of drive.ListFile."""
+
+    def __init__(self, items):
+        self.items = items
+
+    def GetList(self):
+        return self.items
+
+
+class FakeDrive:
+    """In-memory folder tree answering ListFile queries by title."""
+
+    def __init__(self, folders):
+        self.ids = itertools.count(100)
+        self.folders = [FakeFile(self, folder) for folder in folders]
+        self.queries = []
+        self.created = []
+
+    def ListFile(self, params):
+        self.queries.append(params['q'])
+        return FakeList([folder for folder in self.folders
+                         if "title='{}'".format(folder['title'].replace("'", "\\'")) in params['q']])
+
+    def CreateFile(self, metadata):
+        self.created.append(metadata['title'])
+        return FakeFile(self, metadata)
+
+
+def _folder(folder_id, title, parent_id):
+    """Drive folder metadata as returned by ListFile."""
+    return {'id': folder_id, 'title': title, 'parents': [{'id': parent_id}]}
+
+
+@pytest.fixture
+def make_uploader(monkeypatch):
+    """Build GDriveUploader instances backed by a FakeDrive holding the given folders."""
+    def make(folders, folder_paths=None):
+        drive = FakeDrive(folders)
+
+        def authenticate(self):
+            self.drive = drive
+
+        def setup_root_folder(self):
+            self.root_folder_id = 'root'
+
+        monkeypatch.setattr(GDriveUploader, '_authenticate', authenticate)
+        monkeypatch.setattr(GDriveUploader, '_setup_root_folder', setup_root_folder)
+        return GDriveUploader(folder_paths=folder_paths), drive
+    return make
+
+
+class TestPrepopulateFolders:
+    """Tests for stitching folder paths out of a single title query."""
+
+    def test_existing_paths_reused(self, make_uploader):
+        """Test that existing nested folders are resolved without creating anything."""
+        uploader, drive = make_uploader([
+            _folder('b', 'batch', 'root'),
+            _folder('bi', 'images', 'b'),
+            _folder('bj', 'json', 'b'),
+        ], folder_paths=['batch/images', 'batch/json'])
+
+        assert uploader.folder_cache == {'batch/images': 'bi', 'batch/json': 'bj'}
+        assert drive.created == []
+        assert len(drive.queries) == 1
+
+    def test_same_title_under_other_parent_ignored(self, make_uploader):
+        """Test that a folder is only matched under its own parent, not by title alone."""
+        uploader, drive = make_uploader([
+            _folder('b', 'batch', 'root'),
+            _folder('oi', 'images', 'other'),
+        ], folder_paths=['batch/images'])
+
+        created = drive.folders[-1]
+        assert drive.created == ['images']
+        assert created['parents'] == [{'id': 'b'}]
+        assert uploader.folder_cache['batch/images'] == created['id']
+
+    def test_missing_components_created(self, make_uploader):
+        """Test that missing path components are created under the right parents, once each."""
+        uploader, drive = make_uploader([_folder('s', 'single_words', 'root')],
+                                        folder_paths=['single_words/images', 'single_words/json',
+                                                      'new/images'])
+
+        assert sorted(drive.created) == ['images', 'images', 'json', 'new']
+        parents = {folder['title'] + '@' + folder['parents'][0]['id']: folder['id']
+                   for folder in drive.folders}
+        assert uploader.folder_cache['single_words/images'] == parents['images@s']
+        assert uploader.folder_cache['single_words/json'] == parents['json@s']
+        assert uploader.folder_cache['new/images'] == parents['images@' + parents['new@root']]
+
+    def test_title_quotes_escaped(self, make_uploader):
+        """Test that quotes in folder names are escaped in the Drive query."""
+        uploader, drive = make_uploader([_folder('q', "it's", 'root')], folder_paths=["it's"])
+
+        assert "title='it\\'s'" in drive.queries[0]
+        assert uploader.folder_cache["it's"] == 'q'
+        assert drive.created == []
+
+    def test_folder_resolved_on_first_use(self, make_uploader):
+        """Test that a folder missing from the cache is resolved when it is first used."""
+        uploader, drive = make_uploader([_folder('i', 'images', 'root')])
+
+        assert uploader._get_folder_id('images') == 'i'
+        assert uploader._get_folder_id('images') == 'i'
+        assert len(drive.queries) == 1
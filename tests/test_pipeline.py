@@ -0,0 +1,145 @@
+"""
+Tests for the helpers shared by the generation scripts (glyphscribe.pipeline).
+"""
+import itertools
+import os
+import random
+from pathlib import Path
+import pytest
+
+from glyphscribe import pipeline
+from glyphscribe.pipeline import get_all_fonts, sample_words
+
+
+def _touch_font(path: Path):
+    """Create an empty font file and make its directory look modified after the cache was written."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"")
+    _bump_mtime(path.parent)
+
+
+def _bump_mtime(directory: Path):
+    """Move a directory's mtime forward, so coarse filesystem timestamps cannot hide the change."""
+    mtime = os.stat(directory).st_mtime + 10
+    os.utime(directory, (mtime, mtime))
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """Font listing cache directory, kept out of the user's home."""
+    monkeypatch.setattr(pipeline, "FONTS_CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+
+@pytest.fixture
+def fonts_dir(tmp_path, cache_dir):
+    """Fonts directory with one .ttf at the top and one .otf in a subdirectory."""
+    fonts = tmp_path / "fonts"
+    (fonts / "hw").mkdir(parents=True)
+    (fonts / "a.ttf").write_bytes(b"")
+    (fonts / "hw" / "b.otf").write_bytes(b"")
+    return str(fonts)
+
+
+def _fail_scan(_):
+    raise AssertionError("fonts directory rescanned")
+
+
+class TestFontsCache:
+    """Tests for the mtime-keyed font listing cache."""
+
+    def test_cache_written_outside_fonts_dir(self, fonts_dir, cache_dir):
+        """Test that the first lookup writes the cache file outside the font tree."""
+        fonts = get_all_fonts(fonts_dir)
+        assert sorted(fonts) == sorted([os.path.join(fonts_dir, "a.ttf"),
+                                        os.path.join(fonts_dir, "hw", "b.otf")])
+        assert len(list(cache_dir.iterdir())) == 1
+        assert sorted(os.listdir(fonts_dir)) == ["a.ttf", "hw"]
+
+    def test_cache_reused(self, fonts_dir, monkeypatch):
+        """Test that an unchanged directory tree is served from the cache without rescanning."""
+        fonts = get_all_fonts(fonts_dir)
+        monkeypatch.setattr(pipeline, "_scan_fonts", _fail_scan)
+        assert get_all_fonts(fonts_dir) == fonts
+
+    def test_cache_keyed_on_resolved_dir(self, fonts_dir, monkeypatch):
+        """Test that another spelling of fonts_dir shares the cache but gets paths in its own spelling."""
+        get_all_fonts(fonts_dir)
+        monkeypatch.setattr(pipeline, "_scan_fonts", _fail_scan)
+        monkeypatch.chdir(os.path.dirname(fonts_dir))
+        assert sorted(get_all_fonts("fonts/")) == [os.path.join("fonts", "a.ttf"),
+                                                   os.path.join("fonts", "hw", "b.otf")]
+
+    def test_font_added(self, fonts_dir):
+        """Test that a font added to an existing directory invalidates the cache."""
+        get_all_fonts(fonts_dir)
+        _touch_font(Path(fonts_dir) / "hw" / "c.ttf")
+        assert os.path.join(fonts_dir, "hw", "c.ttf") in get_all_fonts(fonts_dir)
+
+    def test_font_removed(self, fonts_dir):
+        """Test that a removed font invalidates the cache."""
+        get_all_fonts(fonts_dir)
+        removed = Path(fonts_dir) / "hw" / "b.otf"
+        removed.unlink()
+        _bump_mtime(removed.parent)
+        assert str(removed) not in get_all_fonts(fonts_dir)
+
+    def test_font_added_in_new_subdirectory(self, fonts_dir):
+        """Test that a font in a newly created subdirectory invalidates the cache."""
+        get_all_fonts(fonts_dir)
+        new_dir = Path(fonts_dir) / "new"
+        _touch_font(new_dir / "d.ttf")
+        _bump_mtime(Path(fonts_dir))
+        assert str(new_dir / "d.ttf") in get_all_fonts(fonts_dir)
+
+
+def _samples(words_per_sample=5):
+    """Endless stream of dataset samples, counting how many were read."""
+    for i in itertools.count():
+        _samples.read = i + 1
+        yield {'id': i, 'text': ' '.join(f"w{i}_{j}" for j in range(words_per_sample))}
+
+
+class TestSampleWords:
+    """Tests for the reservoir word sampler."""
+
+    def test_returns_exactly_k_words(self):
+        """Test that k words are kept when the stream has more than k."""
+        words, num_words, num_samples = sample_words(_samples(), 7, max_samples=10, rng=random.Random(0))
+        assert len(words) == 7
+        assert len(set(words)) == 7
+        assert (num_words, num_samples) == (50, 10)
+
+    def test_stops_at_max_samples(self):
+        """Test that an endless stream is only read up to max_samples."""
+        sample_words(_samples(), 3, max_samples=4, rng=random.Random(0))
+        assert _samples.read == 4
+
+    def test_fewer_words_than_k(self):
+        """Test that every word is kept when the stream has fewer than k."""
+        words, num_words, _ = sample_words(_samples(2), 10, max_samples=3, rng=random.Random(0))
+        assert sorted(words) == sorted(f"w{i}_{j}" for i in range(3) for j in range(2))
+        assert num_words == 6
+
+    def test_min_length_and_text_column(self):
+        """Test that short words are skipped and the text is found outside a 'text' column."""
+        samples = [{'id': 0, 'sentence': 'a bb ccc'}, {'id': 1, 'sentence': 'd ee'}, {'id': 2, 'sentence': '   '}]
+        words, num_words, num_samples = sample_words(samples, 10, min_length=2, rng=random.Random(0))
+        assert sorted(words) == ['bb', 'ccc', 'ee']
+        assert (num_words, num_samples) == (3, 3)
+
+    def test_no_text_column(self):
+        """Test that samples without a string column yield no words."""
+        words, num_words, num_samples = sample_words([{'id': 0}, {'id': 1}], 10, rng=random.Random(0))
+        assert (words, num_words, num_samples) == ([], 0, 2)
+
+    def test_uniform_sample(self):
+        """Test that every word is about equally likely to be kept."""
+        counts = dict.fromkeys(range(20), 0)
+        for seed in range(2000):
+            words, _, _ = sample_words([{'text': ' '.join(f"w{i:02d}" for i in range(20))}], 5,
+                                       rng=random.Random(seed))
+            for word in words:
+                counts[int(word[1:])] += 1
+        # Each word is expected 2000 * 5 / 20 = 500 times
+        assert all(400 < count < 600 for count in counts.values())